@@ -1,30 +1,44 @@
-from flask import Flask, request, jsonify, render_template_string, send_from_directory, session, redirect, url_for
+from flask import Flask, Blueprint, current_app, request, jsonify, render_template_string, abort, session, redirect, url_for, Response, stream_with_context
 from flask_cors import CORS
-from flask_session import Session
 import requests
 import os
 from dotenv import load_dotenv
-import re
-import sqlite3
-import json
-from datetime import datetime
-import secrets
 
-# Load environment variables
+# Load environment variables first: the local modules below read their settings at import
 load_dotenv()
 
-app = Flask(__name__)
-app.secret_key = os.getenv('SECRET_KEY', secrets.token_hex(32))
+import io
+import re
+import json
+import base64
+import sqlite3
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+import math
+import random
+import time
+from itertools import islice, zip_longest
+import secrets
+import hashlib
+import logging
+import contextvars
+import db
+import telemetry
+import assets
+import expansion
+from telemetry import timer
+from sessions import init_sessions, SESSION_BACKEND
+from cache import ResponseCache
+from repo_index import RepoIndex
+from prefetch import PrefetchWorker, RANDOM_SEED_QUERIES, RANDOM_PER_PAGE
+from github_client import (http as github_http, RateLimitTracker, SingleFlight,
+                           conditional_headers, response_validators)
 
-# Configure Flask-Session for persistent sessions
-app.config['SESSION_TYPE'] = 'filesystem'
-app.config['SESSION_PERMANENT'] = True
-app.config['SESSION_FILE_DIR'] = './flask_session'
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
+telemetry.configure_logging()
+log = logging.getLogger(__name__)
 
-Session(app)
-CORS(app, supports_credentials=True)  # Enable CORS for frontend requests
+# Routes live on a blueprint; create_app() builds the Flask app around it
+bp = Blueprint('main', __name__)
 
 # GitHub token (optional but recommended for higher rate limits)
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
@@ -33,40 +47,298 @@ GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
 GITHUB_CLIENT_ID = os.getenv('GITHUB_CLIENT_ID')
 GITHUB_CLIENT_SECRET = os.getenv('GITHUB_CLIENT_SECRET')
 
-# GitHub API endpoints
-GITHUB_SEARCH_URL = "https://api.github.com/search/repositories"
-GITHUB_OAUTH_AUTHORIZE = "https://github.com/login/oauth/authorize"
-GITHUB_OAUTH_TOKEN = "https://github.com/login/oauth/access_token"
-GITHUB_USER_API = "https://api.github.com/user"
-
-# Database setup
-def init_db():
-    """Initialize SQLite database"""
-    conn = sqlite3.connect('reporetriever.db')
-    c = conn.cursor()
-    
-    # Users table
-    c.execute('''CREATE TABLE IF NOT EXISTS users
-                 (id INTEGER PRIMARY KEY,
-                  github_id INTEGER UNIQUE,
-                  username TEXT,
-                  access_token TEXT,
-                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    
-    # Saved repositories table
-    c.execute('''CREATE TABLE IF NOT EXISTS saved_repos
-                 (id INTEGER PRIMARY KEY,
-                  user_id INTEGER,
-                  repo_data TEXT,
-                  user_note TEXT,
-                  saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                  FOREIGN KEY (user_id) REFERENCES users(id))''')
-    
-    conn.commit()
-    conn.close()
-
-# Initialize database on startup
-init_db()
+# GitHub API endpoints (the base URLs can point at a local stand-in for benchmarks)
+GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+GITHUB_WEB_URL = os.getenv('GITHUB_WEB_URL', 'https://github.com').rstrip('/')
+GITHUB_SEARCH_URL = f"{GITHUB_API_URL}/search/repositories"
+GITHUB_OAUTH_AUTHORIZE = f"{GITHUB_WEB_URL}/login/oauth/authorize"
+GITHUB_OAUTH_TOKEN = f"{GITHUB_WEB_URL}/login/oauth/access_token"
+GITHUB_USER_API = f"{GITHUB_API_URL}/user"
+
+# Search response cache (TTL in seconds, LRU size in entries)
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', '300'))
+SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', '256'))
+SEARCH_CACHE_PERSIST = os.getenv('SEARCH_CACHE_PERSIST', '').lower() in ('1', 'true', 'yes')
+
+# GitHub profile lookups at login, keyed by a hash of the access token (memory only)
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '60'))
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '1024'))
+
+# Local index of harvested repositories, consulted before calling GitHub
+REPO_INDEX_ENABLED = os.getenv('REPO_INDEX_ENABLED', '1').lower() in ('1', 'true', 'yes')
+REPO_INDEX_MIN_RESULTS = int(os.getenv('REPO_INDEX_MIN_RESULTS', '12'))
+REPO_INDEX_MAX_AGE = float(os.getenv('REPO_INDEX_MAX_AGE', '604800')) or None  # seconds (7 days); 0 keeps rows forever
+
+# Background refresh of hot searches and the random-repo pool
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', '1').lower() in ('1', 'true', 'yes')
+
+# Most repository ids accepted by one batch saved-check
+MAX_BATCH_CHECK = 100
+
+# Multi-variant search: how many GitHub queries one search may fan out to,
+# how many run at once, and how long to wait before returning partial results
+MAX_SEARCH_VARIANTS = int(os.getenv('MAX_SEARCH_VARIANTS', '4'))
+SEARCH_FANOUT_WORKERS = int(os.getenv('SEARCH_FANOUT_WORKERS', '8'))
+SEARCH_TIME_BUDGET = float(os.getenv('SEARCH_TIME_BUDGET', '4'))
+MULTI_SEARCH_RESULTS = 24
+RECENCY_WEIGHT = 1.0  # a repo pushed today ranks like one with 10x the stars
+
+# Saved repos page size (default and upper bound for ?limit=)
+SAVED_PAGE_SIZE = 50
+MAX_SAVED_PAGE_SIZE = 200
+
+# Bulk import/export: rows per transaction or per streamed chunk, and how
+# many bad import lines are reported back individually
+IMPORT_BATCH_SIZE = 1000
+EXPORT_BATCH_SIZE = 500
+MAX_IMPORT_ERRORS = 20
+SAVED_AT_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}')
+
+# Frontend files, held in memory with pre-compressed variants. index.html is
+# revalidated on every load so a deploy shows up at once; the favicon is cached.
+index_asset = assets.StaticAsset('index.html', 'text/html', 'no-cache')
+favicon_asset = assets.StaticAsset('favicon.png', 'image/png', 'public, max-age=604800')
+
+# Per-process state. Each worker process imports this module on its own
+# (gunicorn.conf.py keeps preload_app off), so caches, pools and threads are
+# never shared across a fork.
+search_cache = ResponseCache(
+    ttl=SEARCH_CACHE_TTL,
+    max_size=SEARCH_CACHE_SIZE,
+    persist=SEARCH_CACHE_PERSIST
+)
+
+user_cache = ResponseCache(ttl=USER_CACHE_TTL, max_size=USER_CACHE_SIZE, table='user_cache')
+
+repo_index = RepoIndex(min_results=REPO_INDEX_MIN_RESULTS, max_age=REPO_INDEX_MAX_AGE)
+
+# Bounded pool shared by every multi-variant search
+search_executor = ThreadPoolExecutor(max_workers=SEARCH_FANOUT_WORKERS, thread_name_prefix='search')
+
+# Identical concurrent searches share one upstream call
+search_flight = SingleFlight()
+search_rate_limit = RateLimitTracker()
+
+# Hot queries are counted on the interactive path and refreshed in the background
+prefetcher = PrefetchWorker(
+    refresh=lambda query, per_page, sort: refresh_github_search(query, per_page, sort),
+    ttl_remaining=lambda query, per_page, sort: search_cache.ttl_remaining(search_cache_key(query, per_page, sort)),
+    rate_limit=search_rate_limit,
+    lock_path=db.DATABASE_PATH + '.prefetch.lock',
+    shared=True
+)
+
+# ===== Query Conversion Tables =====
+# Built once at import time and compiled into a single matcher below, so the
+# cost of converting a query grows with the query length, not the table size.
+
+# Language detection patterns (first language in table order wins)
+LANGUAGE_PATTERNS = {
+    'python': ['python', 'py', 'django', 'flask', 'fastapi', 'pandas', 'numpy', 'scikit', 'tensorflow'],
+    'javascript': ['javascript', 'js', 'node', 'react', 'vue', 'angular', 'express', 'npm'],
+    'typescript': ['typescript', 'ts'],
+    'java': ['java', 'spring', 'hibernate', 'maven'],
+    'go': ['go', 'golang'],
+    'rust': ['rust'],
+    'cpp': ['c++', 'cpp'],
+    'c': [' c ', 'c library', 'c framework'],
+    'php': ['php', 'laravel', 'symfony', 'composer'],
+    'ruby': ['ruby', 'rails', 'gem'],
+    'swift': ['swift', 'ios'],
+    'kotlin': ['kotlin', 'android'],
+    'csharp': ['c#', 'csharp', '.net', 'dotnet'],
+    'shell': ['bash', 'shell', 'script'],
+    'html': ['html', 'css', 'web'],
+    'r': [' r ', 'r language', 'rstats'],
+    'scala': ['scala'],
+    'dart': ['dart', 'flutter']
+}
+
+# Topic mapping - maps common phrases to GitHub search keywords
+TOPIC_MAPPING = {
+    # Web Development
+    'web scraping': ['web-scraping', 'scraper', 'crawler'],
+    'scraping': ['scraper', 'web-scraping'],
+    'crawler': ['crawler', 'scraper'],
+    'dashboard': ['dashboard', 'admin', 'panel'],
+    'admin panel': ['admin', 'dashboard', 'panel'],
+    'ui components': ['ui', 'components', 'library'],
+    'component library': ['components', 'ui', 'library'],
+    'rest api': ['rest-api', 'api'],
+    'graphql': ['graphql', 'api'],
+    'authentication': ['auth', 'authentication', 'login'],
+    'oauth': ['oauth', 'authentication'],
+    'jwt': ['jwt', 'auth'],
+
+    # Data & ML
+    'machine learning': ['machine-learning', 'ml', 'ai'],
+    'deep learning': ['deep-learning', 'neural-network', 'ml'],
+    'neural network': ['neural-network', 'deep-learning'],
+    'data science': ['data-science', 'analytics', 'visualization'],
+    'data visualization': ['visualization', 'charts', 'plotting'],
+    'database': ['database', 'db', 'storage'],
+    'sql': ['sql', 'database'],
+    'nosql': ['nosql', 'database'],
+    'mongodb': ['mongodb', 'nosql'],
+    'postgres': ['postgresql', 'database'],
+    'mysql': ['mysql', 'database'],
+
+    # Development Tools
+    'testing': ['testing', 'test', 'unittest'],
+    'unit test': ['unittest', 'testing'],
+    'docker': ['docker', 'container'],
+    'kubernetes': ['kubernetes', 'k8s', 'container'],
+    'ci/cd': ['ci-cd', 'automation', 'deployment'],
+    'deployment': ['deployment', 'deploy'],
+    'monitoring': ['monitoring', 'logging', 'metrics'],
+    'logging': ['logging', 'monitor'],
+
+    # Mobile & Game Development
+    'mobile': ['mobile', 'app'],
+    'android': ['android', 'mobile'],
+    'ios': ['ios', 'mobile'],
+    'game engine': ['game-engine', 'game', 'gaming'],
+    'game development': ['game', 'gaming', 'engine'],
+    '2d game': ['2d', 'game'],
+    '3d game': ['3d', 'game'],
+
+    # Tools & Utilities
+    'command line': ['cli', 'command-line'],
+    'cli tool': ['cli', 'tool'],
+    'parser': ['parser', 'parsing'],
+    'json parser': ['json', 'parser'],
+    'xml parser': ['xml', 'parser'],
+    'file upload': ['upload', 'file'],
+    'image processing': ['image', 'processing', 'graphics'],
+    'pdf': ['pdf', 'document'],
+    'email': ['email', 'mail'],
+    'encryption': ['encryption', 'crypto', 'security'],
+    'security': ['security', 'auth'],
+    'blockchain': ['blockchain', 'crypto'],
+    'cryptocurrency': ['crypto', 'blockchain']
+}
+
+# Common words filtered out of the general keywords
+STOP_WORDS = frozenset({
+    'i', 'need', 'want', 'looking', 'for', 'a', 'an', 'the', 'that', 'can',
+    'help', 'me', 'with', 'to', 'and', 'or', 'but', 'is', 'are', 'was',
+    'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
+    'would', 'could', 'should', 'may', 'might', 'must', 'shall', 'library',
+    'framework', 'tool', 'application', 'app', 'project', 'code', 'simple',
+    'easy', 'good', 'best', 'great', 'awesome', 'cool', 'nice'
+})
+
+# Quality/size/activity qualifier groups: (trigger phrases, qualifiers).
+# Within a group only the first matching entry applies; None is the fallback.
+QUALIFIER_RULES = [
+    [
+        (['beginner', 'easy', 'simple', 'starter'], ['stars:>100']),  # Just use stars, not good-first-issues
+        (['popular', 'widely used', 'well known', 'famous'], ['stars:>1000', 'forks:>100']),
+        (['mature', 'stable', 'production'], ['stars:>500', 'pushed:>2023-01-01']),
+        (None, ['stars:>10']),  # Default quality filter
+    ],
+    [
+        (['lightweight', 'small', 'minimal'], ['size:<1000']),
+        (['comprehensive', 'full', 'complete'], ['size:>1000']),
+    ],
+    [
+        (['active', 'maintained', 'recent', 'updated'], ['pushed:>2023-06-01']),
+    ],
+]
+
+class PhraseMatcher:
+    """Aho-Corasick automaton reporting every phrase that occurs as a substring"""
+
+    def __init__(self, phrases):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+
+        # Build the trie
+        for phrase in phrases:
+            node = 0
+            for char in phrase:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                node = next_node
+            if phrase not in self.output[node]:
+                self.output[node] += (phrase,)
+
+        # Breadth-first pass to link failure transitions and merge outputs
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                fallback = self.goto[state].get(char, 0)
+                self.fail[child] = fallback if fallback != child else 0
+                self.output[child] += self.output[self.fail[child]]
+
+    def find(self, text):
+        """Return the set of phrases found anywhere in text"""
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+def _rank_languages(language_patterns):
+    """Map each language pattern to (table position, language) of its first owner"""
+    ranks = {}
+    for rank, (lang, patterns) in enumerate(language_patterns.items()):
+        for pattern in patterns:
+            ranks.setdefault(pattern, (rank, lang))
+    return ranks
+
+_LANGUAGE_RANK = _rank_languages(LANGUAGE_PATTERNS)
+_TOPIC_RANK = {phrase: rank for rank, phrase in enumerate(TOPIC_MAPPING)}
+_QUALIFIER_PHRASES = [phrase
+                      for group in QUALIFIER_RULES
+                      for triggers, _ in group if triggers
+                      for phrase in triggers]
+
+_QUALIFIER_WORDS = frozenset(phrase for phrase in _QUALIFIER_PHRASES if ' ' not in phrase)
+
+QUERY_MATCHER = PhraseMatcher(list(_LANGUAGE_RANK) + list(_TOPIC_RANK) + _QUALIFIER_PHRASES)
+WORD_RE = re.compile(r'\b\w+\b')
+
+# Language variants each cost a GitHub call, so for them a pattern only counts as a
+# whole word that is not part of a longer pattern or topic phrase ('java' in
+# 'javascript', 'go' in 'django', 'web' in 'web scraping')
+_VARIANT_LANGUAGES = {pattern.strip(): rank for pattern, rank in _LANGUAGE_RANK.items()}
+_VARIANT_RE = re.compile(r'(?<!\w)(?:%s)(?!\w)' % '|'.join(
+    re.escape(phrase) for phrase in sorted(set(_VARIANT_LANGUAGES) | set(TOPIC_MAPPING), key=len, reverse=True)))
+
+def _match_terms(query):
+    """Known phrases, matched topic phrases (table order) and meaningful words of a lowercased query"""
+    # Single pass over the query finds every known phrase
+    matched = QUERY_MATCHER.find(query)
+    topics = sorted((phrase for phrase in matched if phrase in _TOPIC_RANK), key=_TOPIC_RANK.get)
+    
+    # Extract meaningful words
+    words = WORD_RE.findall(query)
+    meaningful_words = [word for word in words if len(word) > 2 and word not in STOP_WORDS]
+    
+    return matched, topics, meaningful_words
+
+def _keyword_candidates(topics, meaningful_words, language):
+    """Topic keywords (table order) then query words, minus words a qualifier or compound keyword covers"""
+    keywords = [keyword for phrase in topics for keyword in TOPIC_MAPPING[phrase]]
+    covered = {part for keyword in keywords for part in keyword.split('-')} | _QUALIFIER_WORDS | {language}
+    keywords += [word for word in meaningful_words if word not in covered]
+    return list(dict.fromkeys(keywords))
 
 def smart_query_converter(user_query):
     """Convert natural language query to GitHub search terms using smart keyword matching"""
@@ -80,145 +352,73 @@ def smart_query_converter(user_query):
         "qualifiers": []
     }
     
-    # Language detection patterns
-    language_patterns = {
-        'python': ['python', 'py', 'django', 'flask', 'fastapi', 'pandas', 'numpy', 'scikit', 'tensorflow'],
-        'javascript': ['javascript', 'js', 'node', 'react', 'vue', 'angular', 'express', 'npm'],
-        'typescript': ['typescript', 'ts'],
-        'java': ['java', 'spring', 'hibernate', 'maven'],
-        'go': ['go', 'golang'],
-        'rust': ['rust'],
-        'cpp': ['c++', 'cpp'],
-        'c': [' c ', 'c library', 'c framework'],
-        'php': ['php', 'laravel', 'symfony', 'composer'],
-        'ruby': ['ruby', 'rails', 'gem'],
-        'swift': ['swift', 'ios'],
-        'kotlin': ['kotlin', 'android'],
-        'csharp': ['c#', 'csharp', '.net', 'dotnet'],
-        'shell': ['bash', 'shell', 'script'],
-        'html': ['html', 'css', 'web'],
-        'r': [' r ', 'r language', 'rstats'],
-        'scala': ['scala'],
-        'dart': ['dart', 'flutter']
-    }
+    matched, topics, meaningful_words = _match_terms(query)
     
     # Detect programming language
-    for lang, patterns in language_patterns.items():
-        if any(pattern in query for pattern in patterns):
-            result['language'] = lang
-            break
-    
-    # Topic mapping - maps common phrases to GitHub search keywords
-    topic_mapping = {
-        # Web Development
-        'web scraping': ['web-scraping', 'scraper', 'crawler'],
-        'scraping': ['scraper', 'web-scraping'],
-        'crawler': ['crawler', 'scraper'],
-        'dashboard': ['dashboard', 'admin', 'panel'],
-        'admin panel': ['admin', 'dashboard', 'panel'],
-        'ui components': ['ui', 'components', 'library'],
-        'component library': ['components', 'ui', 'library'],
-        'rest api': ['rest-api', 'api'],
-        'graphql': ['graphql', 'api'],
-        'authentication': ['auth', 'authentication', 'login'],
-        'oauth': ['oauth', 'authentication'],
-        'jwt': ['jwt', 'auth'],
-        
-        # Data & ML
-        'machine learning': ['machine-learning', 'ml', 'ai'],
-        'deep learning': ['deep-learning', 'neural-network', 'ml'],
-        'neural network': ['neural-network', 'deep-learning'],
-        'data science': ['data-science', 'analytics', 'visualization'],
-        'data visualization': ['visualization', 'charts', 'plotting'],
-        'database': ['database', 'db', 'storage'],
-        'sql': ['sql', 'database'],
-        'nosql': ['nosql', 'database'],
-        'mongodb': ['mongodb', 'nosql'],
-        'postgres': ['postgresql', 'database'],
-        'mysql': ['mysql', 'database'],
-        
-        # Development Tools
-        'testing': ['testing', 'test', 'unittest'],
-        'unit test': ['unittest', 'testing'],
-        'docker': ['docker', 'container'],
-        'kubernetes': ['kubernetes', 'k8s', 'container'],
-        'ci/cd': ['ci-cd', 'automation', 'deployment'],
-        'deployment': ['deployment', 'deploy'],
-        'monitoring': ['monitoring', 'logging', 'metrics'],
-        'logging': ['logging', 'monitor'],
-        
-        # Mobile & Game Development
-        'mobile': ['mobile', 'app'],
-        'android': ['android', 'mobile'],
-        'ios': ['ios', 'mobile'],
-        'game engine': ['game-engine', 'game', 'gaming'],
-        'game development': ['game', 'gaming', 'engine'],
-        '2d game': ['2d', 'game'],
-        '3d game': ['3d', 'game'],
-        
-        # Tools & Utilities
-        'command line': ['cli', 'command-line'],
-        'cli tool': ['cli', 'tool'],
-        'parser': ['parser', 'parsing'],
-        'json parser': ['json', 'parser'],
-        'xml parser': ['xml', 'parser'],
-        'file upload': ['upload', 'file'],
-        'image processing': ['image', 'processing', 'graphics'],
-        'pdf': ['pdf', 'document'],
-        'email': ['email', 'mail'],
-        'encryption': ['encryption', 'crypto', 'security'],
-        'security': ['security', 'auth'],
-        'blockchain': ['blockchain', 'crypto'],
-        'cryptocurrency': ['crypto', 'blockchain']
-    }
+    languages = [_LANGUAGE_RANK[phrase] for phrase in matched if phrase in _LANGUAGE_RANK]
+    if languages:
+        result['language'] = min(languages)[1]
     
-    # Extract keywords based on topics found
-    keywords_found = set()
-    for phrase, keywords in topic_mapping.items():
-        if phrase in query:
-            keywords_found.update(keywords)
-    
-    # Add general keywords from the query (filter out common words)
-    stop_words = {
-        'i', 'need', 'want', 'looking', 'for', 'a', 'an', 'the', 'that', 'can', 
-        'help', 'me', 'with', 'to', 'and', 'or', 'but', 'is', 'are', 'was', 
-        'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
-        'would', 'could', 'should', 'may', 'might', 'must', 'shall', 'library',
-        'framework', 'tool', 'application', 'app', 'project', 'code', 'simple',
-        'easy', 'good', 'best', 'great', 'awesome', 'cool', 'nice'
-    }
+    model = expansion.get_model()
+    if model is not None:
+        # The offline model picks the 3 best keywords out of everything the query offers
+        candidates = _keyword_candidates(topics, meaningful_words, result['language'])
+        result['keywords'] = model.rank(candidates, candidates)[:3]
+    else:
+        # Extract keywords based on topics found (in table order)
+        keywords_found = set()
+        for phrase in topics:
+            keywords_found.update(TOPIC_MAPPING[phrase])
+        
+        # Add some meaningful words as keywords (limit to avoid too broad search)
+        keywords_found.update(meaningful_words[:3])
+        
+        result['keywords'] = list(keywords_found)[:3]  # Limit to 3 keywords max for better results
     
-    # Extract meaningful words
-    words = re.findall(r'\b\w+\b', query)
-    meaningful_words = [word for word in words if len(word) > 2 and word not in stop_words]
+    # Quality, size and activity qualifiers
+    for group in QUALIFIER_RULES:
+        for triggers, qualifiers in group:
+            if triggers is None or any(phrase in matched for phrase in triggers):
+                result['qualifiers'].extend(qualifiers)
+                break
     
-    # Add some meaningful words as keywords (limit to avoid too broad search)
-    keywords_found.update(meaningful_words[:3])
+    return result
+
+def query_variants(user_query, search_params, max_variants=MAX_SEARCH_VARIANTS):
+    """Search params covering every language and keyword the query mentions, base params first"""
     
-    result['keywords'] = list(keywords_found)[:3]  # Limit to 3 keywords max for better results
+    query = user_query.lower().strip()
+    matched, topics, meaningful_words = _match_terms(query)
     
-    # Quality and difficulty qualifiers
-    if any(word in query for word in ['beginner', 'easy', 'simple', 'starter']):
-        result['qualifiers'].extend(['stars:>100'])  # Just use stars, not good-first-issues
-    elif any(word in query for word in ['popular', 'widely used', 'well known', 'famous']):
-        result['qualifiers'].extend(['stars:>1000', 'forks:>100'])
-    elif any(word in query for word in ['mature', 'stable', 'production']):
-        result['qualifiers'].extend(['stars:>500', 'pushed:>2023-01-01'])
-    else:
-        # Default quality filter
-        result['qualifiers'].append('stars:>10')
+    # Every language named as a whole word, in table order
+    languages = sorted({_VARIANT_LANGUAGES[match.group()] for match in _VARIANT_RE.finditer(query)
+                        if match.group() in _VARIANT_LANGUAGES})
     
-    # Size preferences
-    if any(word in query for word in ['lightweight', 'small', 'minimal']):
-        result['qualifiers'].append('size:<1000')
-    elif any(word in query for word in ['comprehensive', 'full', 'complete']):
-        result['qualifiers'].append('size:>1000')
+    # Every keyword the base params had to drop
+    keywords = []
+    for phrase in topics:
+        keywords.extend(TOPIC_MAPPING[phrase])
+    keywords.extend(meaningful_words)
+    unused = list(dict.fromkeys(kw for kw in keywords if kw not in search_params['keywords']))
     
-    # Activity preferences
-    if any(word in query for word in ['active', 'maintained', 'recent', 'updated']):
-        result['qualifiers'].append('pushed:>2023-06-01')
+    model = expansion.get_model()
+    if model is not None:
+        # Best leftovers first, then terms the corpus associates with the query
+        context = _keyword_candidates(topics, meaningful_words, search_params['language'])
+        leftovers = [kw for kw in context if kw not in search_params['keywords']]
+        unused = model.rank(leftovers, context) + model.expand(context, exclude=keywords, limit=3)
     
-    return result
+    language_variants = [dict(search_params, language=lang)
+                         for _, lang in languages if lang != search_params['language']]
+    keyword_variants = [dict(search_params, keywords=unused[i:i + 3])
+                        for i in range(0, len(unused), 3)]
+    
+    # Alternate the two kinds so neither crowds the other out of the cap
+    variants = [search_params]
+    for pair in zip_longest(language_variants, keyword_variants):
+        variants.extend(variant for variant in pair if variant is not None)
+    
+    return variants[:max_variants]
 
 def build_github_query(search_params):
     """Build GitHub search query from parameters"""
@@ -238,8 +438,16 @@ def build_github_query(search_params):
     
     return ' '.join(query_parts)
 
-def search_github_repositories(query):
-    """Search GitHub repositories using their API"""
+def search_cache_key(query, per_page, sort):
+    """Normalize a GitHub query into a cache key (term order does not affect results)"""
+    normalized = ' '.join(sorted(query.lower().split()))
+    return f"{sort}|{per_page}|{normalized}"
+
+def fetch_github_repositories(query, per_page=12, sort="stars", validators=None):
+    """Call the GitHub search API and record the rate limit it reports.
+    
+    Returns (items, validators); items is None when GitHub answers 304 Not Modified.
+    """
     
     headers = {
         "Accept": "application/vnd.github.v3+json",
@@ -250,91 +458,440 @@ def search_github_repositories(query):
     if GITHUB_TOKEN:
         headers["Authorization"] = f"token {GITHUB_TOKEN}"
     
+    # Revalidate a cached copy instead of downloading it again
+    headers.update(conditional_headers(validators))
+    
     params = {
         "q": query,
-        "sort": "stars",
+        "sort": sort,
         "order": "desc",
-        "per_page": 12  # Get more results
+        "per_page": per_page  # Get more results
     }
     
-    try:
-        response = requests.get(GITHUB_SEARCH_URL, headers=headers, params=params)
-        response.raise_for_status()
+    with timer('upstream'):
+        response = github_http.get(GITHUB_SEARCH_URL, headers=headers, params=params)
+    search_rate_limit.update(response.headers)
+    if response.status_code == 304:
+        return None, validators
+    response.raise_for_status()
+    
+    data = response.json()
+    return data.get('items', []), response_validators(response)
+
+def refresh_github_search(query, per_page=12, sort="stars"):
+    """Fetch a search from GitHub (coalesced with identical in-flight calls) and store it"""
+    
+    cache_key = search_cache_key(query, per_page, sort)
+    
+    def fetch():
+        cached, validators = search_cache.peek(cache_key)
+        items, validators = fetch_github_repositories(
+            query, per_page, sort, validators if cached is not None else None)
         
-        data = response.json()
-        return data.get('items', [])
+        # 304: the expired copy is still current, so it just gets a new TTL
+        if items is None:
+            search_cache.revalidate(cache_key, cached, validators)
+            return cached
+        
+        search_cache.set(cache_key, items, validators)
+        if REPO_INDEX_ENABLED:
+            repo_index.harvest(items)
+        return items
+    
+    return search_flight.do(cache_key, fetch)
+
+def search_github_repositories(query, per_page=12, sort="stars", full=False):
+    """Search GitHub repositories, serving repeats from the cache and sharing in-flight calls.
+    
+    full=True skips the local index, which only keeps the slim record of each repository.
+    """
+    
+    cache_key = search_cache_key(query, per_page, sort)
+    with timer('cache'):
+        cached = search_cache.get(cache_key)
+    if cached is not None:
+        prefetcher.record(query, per_page, sort)
+        return cached
+    
+    # Answer from repositories harvested earlier when enough of them match
+    if REPO_INDEX_ENABLED and not full:
+        with timer('local_index'):
+            local = repo_index.search(query, per_page, sort)
+        if local is not None:
+            return local
+    
+    prefetcher.record(query, per_page, sort)
+    
+    # Keep the remaining budget for queries we have never answered
+    if search_rate_limit.is_low():
+        stale = search_cache.get_stale(cache_key)
+        if stale is not None:
+            log.warning("Rate limit low, serving stale results for: %s", query)
+            return stale
+    
+    try:
+        return refresh_github_search(query, per_page, sort)
         
     except requests.exceptions.RequestException as e:
-        print(f"GitHub API error: {e}")
+        log.warning("GitHub API error: %s", e)
+        stale = search_cache.get_stale(cache_key)
+        if stale is not None:
+            return stale
         raise Exception("Failed to search GitHub repositories")
 
-@app.route('/favicon.png')
+def annotate_saved(repositories, user_id):
+    """Add is_saved/saved_id to each repository using one set-based lookup"""
+    with timer('db'), db.connection() as conn:
+        saved_ids = db.find_saved_ids(conn, user_id, {repo['id'] for repo in repositories})
+    
+    # Copy each item; the originals are shared with the search cache
+    return [dict(repo, is_saved=repo['id'] in saved_ids, saved_id=saved_ids.get(repo['id']))
+            for repo in repositories]
+
+def rank_repositories(repositories):
+    """Order repositories by stars (log scale) with a boost for recent pushes"""
+    now = datetime.now(timezone.utc)
+    
+    def score(repo):
+        stars = math.log10((repo.get('stargazers_count') or 0) + 1)
+        freshness = 0.0
+        if repo.get('pushed_at'):
+            pushed = datetime.fromisoformat(repo['pushed_at'].replace('Z', '+00:00'))
+            freshness = max(0.0, 1 - (now - pushed).days / 365)
+        return stars + RECENCY_WEIGHT * freshness
+    
+    return sorted(repositories, key=score, reverse=True)
+
+def iter_github_variants(github_queries, time_budget=SEARCH_TIME_BUDGET, full=False):
+    """Yield (query, repositories) as each concurrent search finishes; failures yield None"""
+    
+    # Each search runs in a copy of this context so its logs keep the request id
+    futures = {search_executor.submit(contextvars.copy_context().run, search_github_repositories, query,
+                                      full=full): query
+               for query in github_queries}
+    try:
+        for future in as_completed(futures, timeout=time_budget):
+            query = futures[future]
+            if future.exception() is not None:
+                log.warning("Variant failed: %s: %s", query, future.exception())
+                yield query, None
+            else:
+                yield query, future.result()
+    except FuturesTimeoutError:
+        for future, query in futures.items():
+            if not future.done():
+                log.warning("Variant timed out: %s", query)
+
+def stale_variant_results(github_queries):
+    """Expired cached copies of the given searches, deduplicated; the fallback when no variant finishes"""
+    merged = {}
+    for query in github_queries:
+        for repo in search_cache.get_stale(search_cache_key(query, 12, "stars")) or []:
+            merged.setdefault(repo['id'], repo)
+    if merged:
+        log.warning("No variant finished, serving stale results for: %s", github_queries[0])
+    return list(merged.values())
+
+def search_github_variants(github_queries, time_budget=SEARCH_TIME_BUDGET, full=False):
+    """Run several GitHub searches concurrently; returns (merged repositories, partial)"""
+    
+    merged = {}
+    completed = 0
+    for query, repositories in iter_github_variants(github_queries, time_budget, full):
+        if repositories is None:
+            continue
+        completed += 1
+        # Dedupe by repo id
+        for repo in repositories:
+            merged.setdefault(repo['id'], repo)
+    
+    # Every search failed or ran out of time: fall back to expired copies, else fail like a single search
+    if completed == 0:
+        merged = {repo['id']: repo for repo in stale_variant_results(github_queries)}
+        if not merged:
+            raise Exception("Failed to search GitHub repositories")
+    
+    repositories = rank_repositories(merged.values())[:MULTI_SEARCH_RESULTS]
+    return repositories, completed < len(github_queries)
+
+@bp.route('/favicon.png')
 def favicon():
     """Serve the favicon"""
-    return send_from_directory('.', 'favicon.png', mimetype='image/png')
+    try:
+        return favicon_asset.response(reload=current_app.debug)
+    except FileNotFoundError:
+        abort(404)
 
-@app.route('/')
+@bp.route('/')
 def index():
-    """Serve the frontend HTML"""
+    """Serve the frontend HTML (from memory; re-read on change in debug mode)"""
     try:
-        with open('index.html', 'r', encoding='utf-8') as f:
-            return f.read()
+        return index_asset.response(reload=current_app.debug)
     except FileNotFoundError:
         return "Frontend HTML file not found. Please save the frontend code as 'index.html'"
     except UnicodeDecodeError:
         return "HTML file encoding error. Please save index.html with UTF-8 encoding."
 
-@app.route('/search', methods=['POST'])
+def plan_search(user_query, multi):
+    """Convert the query; returns (ai_response, github_query, every GitHub query to run)"""
+    
+    # Step 1: Convert query using smart keyword matching
+    log.debug("Processing query: %s", user_query)
+    with timer('convert'):
+        ai_response = smart_query_converter(user_query)
+    log.debug("Conversion result: %s", ai_response)
+    
+    # Step 2: Build GitHub search query, plus variants when fanning out
+    with timer('build_query'):
+        github_query = build_github_query(ai_response)
+        github_queries = [github_query]
+        if multi:
+            github_queries = list(dict.fromkeys(
+                build_github_query(params) for params in query_variants(user_query, ai_response)
+            ))
+    log.debug("GitHub Query: %s", github_query)
+    return ai_response, github_query, github_queries
+
+def prepare_repositories(repositories, full, user_id):
+    """Trim to the slim record unless full, and mark the ones the user already saved"""
+    if not full:
+        repositories = [db.slim_repo(repo) for repo in repositories]
+    if user_id is not None:
+        repositories = annotate_saved(repositories, user_id)
+    return repositories
+
+def read_search_query(data):
+    """The user's query from a search request body, or an error message"""
+    if not data or 'query' not in data:
+        return None, "Query is required"
+    
+    user_query = data['query'].strip()
+    if not user_query:
+        return None, "Query cannot be empty"
+    return user_query, None
+
+@bp.route('/search', methods=['POST'])
 def search_repositories():
     """Main endpoint to search repositories"""
     
     try:
         # Get user query from request
         data = request.get_json()
-        if not data or 'query' not in data:
-            return jsonify({"error": "Query is required"}), 400
+        user_query, error = read_search_query(data)
+        if error:
+            return jsonify({"error": error}), 400
         
-        user_query = data['query'].strip()
-        if not user_query:
-            return jsonify({"error": "Query cannot be empty"}), 400
+        ai_response, github_query, github_queries = plan_search(user_query, data.get('multi'))
+        full = request.args.get('full') == '1'
         
-        # Step 1: Convert query using smart keyword matching
-        print(f"Processing query: {user_query}")
-        ai_response = smart_query_converter(user_query)
-        print(f"Conversion result: {ai_response}")
+        # Step 3: Search GitHub repositories, fanning out over query variants if asked
+        partial = False
+        if len(github_queries) > 1:
+            repositories, partial = search_github_variants(github_queries, full=full)
+        else:
+            repositories = search_github_repositories(github_query, full=full)
+        log.info("Found %d repositories", len(repositories))
         
-        # Step 2: Build GitHub search query
-        github_query = build_github_query(ai_response)
-        print(f"GitHub Query: {github_query}")
-        
-        # Step 3: Search GitHub repositories
-        repositories = search_github_repositories(github_query)
-        print(f"Found {len(repositories)} repositories")
+        # Step 4: Trim GitHub's payload unless ?full=1 and mark saved repos
+        repositories = prepare_repositories(repositories, full, session.get('user_id'))
         
         # Return results
-        return jsonify({
+        with timer('serialize'):
+            return jsonify({
+                "ai_response": ai_response,
+                "github_query": github_query,
+                "github_queries": github_queries,
+                "partial": partial,
+                "repositories": repositories
+            })
+        
+    except Exception as e:
+        log.error("Search error: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/search/stream', methods=['POST'])
+def search_repositories_stream():
+    """Search endpoint that streams NDJSON events as each GitHub query finishes"""
+    
+    data = request.get_json()
+    user_query, error = read_search_query(data)
+    if error:
+        return jsonify({"error": error}), 400
+    
+    try:
+        ai_response, github_query, github_queries = plan_search(user_query, data.get('multi'))
+    except Exception as e:
+        log.error("Search error: %s", e)
+        return jsonify({"error": str(e)}), 500
+    
+    full = request.args.get('full') == '1'
+    user_id = session.get('user_id')
+    
+    def event(payload):
+        with timer('serialize'):
+            return json.dumps(payload) + '\n'
+    
+    def generate():
+        started = time.perf_counter()
+        yield event({
+            "type": "query",
             "ai_response": ai_response,
             "github_query": github_query,
-            "repositories": repositories
+            "github_queries": github_queries
         })
         
-    except Exception as e:
-        print(f"Error: {e}")
-        return jsonify({"error": str(e)}), 500
+        seen = set()
+        sent = []
+        completed = 0
+        first_result_ms = None
+        for query, repositories in iter_github_variants(github_queries, full=full):
+            if repositories is None:
+                continue
+            completed += 1
+            
+            # Only send repos no earlier batch already sent; done picks the overall top ones
+            fresh = [repo for repo in rank_repositories(repositories) if repo['id'] not in seen]
+            if not fresh:
+                continue
+            seen.update(repo['id'] for repo in fresh)
+            sent.extend(fresh)
+            
+            if first_result_ms is None:
+                first_result_ms = round((time.perf_counter() - started) * 1000, 1)
+            yield event({
+                "type": "repositories",
+                "github_query": query,
+                "repositories": prepare_repositories(fresh, full, user_id)
+            })
+        
+        # Nothing finished: the same fallback as /search, expired copies or an error
+        if completed == 0:
+            sent = rank_repositories(stale_variant_results(github_queries))
+            if not sent:
+                yield event({"type": "error", "error": "Failed to search GitHub repositories"})
+                return
+            seen.update(repo['id'] for repo in sent)
+            first_result_ms = round((time.perf_counter() - started) * 1000, 1)
+            yield event({
+                "type": "repositories",
+                "github_query": github_query,
+                "repositories": prepare_repositories(sent, full, user_id)
+            })
+        
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+        log.info("Streamed %d repositories: first result %s ms, total %s ms", len(seen), first_result_ms, total_ms)
+        yield event({
+            "type": "done",
+            "count": len(seen),
+            "partial": completed < len(github_queries),
+            # Batches are ranked only within themselves; these are the repos /search would return, in its order
+            "order": [repo['id'] for repo in rank_repositories(sent)[:MULTI_SEARCH_RESULTS]],
+            "time_to_first_result_ms": first_result_ms,
+            "total_ms": total_ms
+        })
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
-@app.route('/health', methods=['GET'])
+@bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         "status": "healthy",
         "conversion_type": "smart_keyword_matching",
         "github_configured": bool(GITHUB_TOKEN),
-        "oauth_configured": bool(GITHUB_CLIENT_ID and GITHUB_CLIENT_SECRET)
+        "oauth_configured": bool(GITHUB_CLIENT_ID and GITHUB_CLIENT_SECRET),
+        "search_cache": search_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "search_coalesced": search_flight.coalesced,
+        "search_rate_limit": search_rate_limit.snapshot(),
+        "repo_index": repo_index.stats() if REPO_INDEX_ENABLED else None,
+        "prefetch": prefetcher.stats(),
+        "query_expansion": expansion.stats(),
+        "sessions": current_app.session_interface.stats() if SESSION_BACKEND == 'sqlite' else {"backend": SESSION_BACKEND},
+        "pid": os.getpid()
     })
 
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus-style metrics: stage and request latency, cache ratios, rate limit"""
+    caches = {"search": search_cache.stats(), "user": user_cache.stats()}
+    rate = search_rate_limit.snapshot()
+    prefetch = prefetcher.stats()
+    
+    lookups = [({"cache": name, "result": result}, stats[key])
+               for name, stats in caches.items()
+               for result, key in (("hit", "hits"), ("miss", "misses"),
+                                   ("stale", "stale_hits"), ("revalidated", "revalidated"))]
+    gauges = [
+        ("reporetriever_cache_lookups_total", "counter", "Cache lookups by result", lookups),
+        ("reporetriever_cache_hit_ratio", "gauge", "Fraction of cache lookups that were fresh hits",
+         [({"cache": name}, stats["hit_ratio"]) for name, stats in caches.items()]),
+        ("reporetriever_cache_entries", "gauge", "Entries held in memory",
+         [({"cache": name}, stats["size"]) for name, stats in caches.items()]),
+        ("reporetriever_search_coalesced_total", "counter", "Searches that shared an in-flight upstream call",
+         [({}, search_flight.coalesced)]),
+        ("reporetriever_github_rate_limit_remaining", "gauge", "Search calls GitHub reports as remaining",
+         [({}, rate["remaining"])]),
+        ("reporetriever_github_rate_limit_limit", "gauge", "Search calls allowed per window",
+         [({}, rate["limit"])]),
+        ("reporetriever_github_rate_limit_reset_timestamp", "gauge", "When the rate limit window resets",
+         [({}, rate["reset_at"])]),
+        ("reporetriever_prefetch_refreshed_total", "counter", "Searches refreshed in the background",
+         [({}, prefetch["refreshed"])])
+    ]
+    if REPO_INDEX_ENABLED:
+        index_stats = repo_index.stats()
+        gauges.append(("reporetriever_repo_index_lookups_total", "counter", "Local index lookups by result",
+                       [({"result": "hit"}, index_stats["hits"]), ({"result": "miss"}, index_stats["misses"])]))
+    
+    return Response(telemetry.render_metrics(gauges), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/repos/random', methods=['GET'])
+def random_repo():
+    """A random popular repository from the pre-warmed pool"""
+    try:
+        repo = prefetcher.random_repo()
+        if repo is None:
+            # Pool not warmed yet: fill one seed through the normal cached search path
+            seed = random.choice(RANDOM_SEED_QUERIES)
+            prefetcher.fill_pool(seed, search_github_repositories(seed, per_page=RANDOM_PER_PAGE))
+            repo = prefetcher.random_repo()
+        
+        if repo is None:
+            return jsonify({"error": "No repositories available"}), 503
+        
+        repository = prepare_repositories([repo], False, session.get('user_id'))[0]
+        return jsonify({"repository": repository})
+        
+    except Exception as e:
+        log.error("Random repo error: %s", e)
+        return jsonify({"error": "Failed to get random repository"}), 500
+
 # ===== OAuth Routes =====
 
-@app.route('/auth/login')
+def fetch_github_user(access_token):
+    """Fetch the authenticated user's profile, revalidating a cached copy with its ETag"""
+    cache_key = hashlib.sha256(access_token.encode()).hexdigest()
+    cached = user_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    headers = {'Authorization': f'token {access_token}'}
+    stale, validators = user_cache.peek(cache_key)
+    if stale is not None:
+        headers.update(conditional_headers(validators))
+    
+    response = github_http.get(GITHUB_USER_API, headers=headers)
+    if response.status_code == 304:
+        user_cache.revalidate(cache_key, stale, validators)
+        return stale
+    response.raise_for_status()
+    
+    user_data = response.json()
+    user_cache.set(cache_key, user_data, response_validators(response))
+    return user_data
+
+@bp.route('/auth/login')
 def login():
     """Redirect to GitHub OAuth"""
     if not GITHUB_CLIENT_ID:
@@ -344,18 +901,18 @@ def login():
     github_auth_url = f"{GITHUB_OAUTH_AUTHORIZE}?client_id={GITHUB_CLIENT_ID}&scope=user:email"
     return redirect(github_auth_url)
 
-@app.route('/auth/callback')
+@bp.route('/auth/callback')
 def callback():
     """Handle GitHub OAuth callback"""
     code = request.args.get('code')
-    print(f"OAuth callback received. Code present: {bool(code)}")
+    log.info("OAuth callback received. Code present: %s", bool(code))
     
     if not code:
         return redirect('/?error=oauth_failed')
     
     try:
         # Exchange code for access token
-        token_response = requests.post(
+        token_response = github_http.post(
             GITHUB_OAUTH_TOKEN,
             headers={'Accept': 'application/json'},
             data={
@@ -367,35 +924,28 @@ def callback():
         token_data = token_response.json()
         access_token = token_data.get('access_token')
         
-        print(f"Token exchange successful: {bool(access_token)}")
+        log.info("Token exchange successful: %s", bool(access_token))
         
         if not access_token:
-            print(f"Token error: {token_data}")
+            log.warning("Token error: %s", token_data)
             return redirect('/?error=oauth_failed')
         
         # Get user info from GitHub
-        user_response = requests.get(
-            GITHUB_USER_API,
-            headers={'Authorization': f'token {access_token}'}
-        )
-        user_data = user_response.json()
+        user_data = fetch_github_user(access_token)
         
-        print(f"User data received: {user_data.get('login')}")
+        log.info("User data received: %s", user_data.get('login'))
         
         # Save or update user in database
-        conn = sqlite3.connect('reporetriever.db')
-        c = conn.cursor()
-        
-        c.execute('''INSERT OR REPLACE INTO users (github_id, username, access_token)
-                     VALUES (?, ?, ?)''',
-                  (user_data['id'], user_data['login'], access_token))
-        
-        user_id = c.lastrowid if c.lastrowid else c.execute(
-            'SELECT id FROM users WHERE github_id = ?', (user_data['id'],)
-        ).fetchone()[0]
-        
-        conn.commit()
-        conn.close()
+        with db.connection() as conn:
+            c = conn.cursor()
+            
+            c.execute('''INSERT OR REPLACE INTO users (github_id, username, access_token)
+                         VALUES (?, ?, ?)''',
+                      (user_data['id'], user_data['login'], access_token))
+            
+            user_id = c.lastrowid if c.lastrowid else c.execute(
+                'SELECT id FROM users WHERE github_id = ?', (user_data['id'],)
+            ).fetchone()[0]
         
         # Store user in session
         session['user_id'] = user_id
@@ -403,29 +953,25 @@ def callback():
         session['github_id'] = user_data['id']
         session.permanent = True  # Make session permanent
         
-        print(f"Session set for user: {session['username']}")
-        print(f"Session data: {dict(session)}")
-        print(f"Session permanent: {session.permanent}")
+        log.info("Session set for user: %s", session['username'])
+        log.debug("Session data: %s, permanent: %s", session, session.permanent)
         
         return redirect('/')
         
     except Exception as e:
-        print(f"OAuth error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("OAuth error: %s", e)
         return redirect('/?error=oauth_failed')
 
-@app.route('/auth/logout')
+@bp.route('/auth/logout')
 def logout():
     """Logout user"""
     session.clear()
     return redirect('/')
 
-@app.route('/auth/user')
+@bp.route('/auth/user')
 def get_user():
     """Get current user info"""
-    print(f"Auth check - Session data: {dict(session)}")
-    print(f"User ID in session: {session.get('user_id')}")
+    log.debug("Auth check - session data: %s", session)
     
     if 'user_id' in session:
         return jsonify({
@@ -437,7 +983,7 @@ def get_user():
 
 # ===== Saved Repos Routes =====
 
-@app.route('/repos/save', methods=['POST'])
+@bp.route('/repos/save', methods=['POST'])
 def save_repo():
     """Save a repository for the user"""
     if 'user_id' not in session:
@@ -450,107 +996,306 @@ def save_repo():
     if not repo_data:
         return jsonify({"error": "Repository data required"}), 400
     
+    # The same checks as /repos/import, so a bad payload is a 400 rather than a failed insert
     try:
-        conn = sqlite3.connect('reporetriever.db')
-        c = conn.cursor()
-        
-        c.execute('''INSERT INTO saved_repos (user_id, repo_data, user_note)
-                     VALUES (?, ?, ?)''',
-                  (session['user_id'], json.dumps(repo_data), user_note))
-        
-        conn.commit()
-        saved_id = c.lastrowid
-        conn.close()
+        validate_repo(repo_data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        with db.connection() as conn:
+            saved_id = db.insert_saved_repo(conn, session['user_id'], repo_data, user_note)
         
         return jsonify({"success": True, "saved_id": saved_id})
         
+    except sqlite3.IntegrityError:
+        # The (user_id, github_repo_id) unique index rejects duplicate saves
+        with db.connection() as conn:
+            saved_ids = db.find_saved_ids(conn, session['user_id'], [repo_data.get('id')])
+        return jsonify({
+            "error": "Repository already saved",
+            "saved_id": saved_ids.get(repo_data.get('id'))
+        }), 409
+        
     except Exception as e:
-        print(f"Save error: {e}")
+        log.error("Save error: %s", e)
         return jsonify({"error": "Failed to save repository"}), 500
 
-@app.route('/repos/saved', methods=['GET'])
+def encode_cursor(saved_at, saved_id):
+    """Opaque keyset cursor for the row a page ended on"""
+    return base64.urlsafe_b64encode(json.dumps([saved_at, saved_id]).encode()).decode()
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        saved_at, saved_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(saved_at, str) or not isinstance(saved_id, int):
+        raise ValueError("Invalid cursor")
+    return saved_at, saved_id
+
+def saved_repo_row(row):
+    """JSON shape of a saved_repos row"""
+    return {
+        'id': row[0],
+        'repo': json.loads(row[1]),
+        'note': row[2],
+        'saved_at': row[3]
+    }
+
+@bp.route('/repos/saved', methods=['GET'])
 def get_saved_repos():
-    """Get all saved repositories for the user"""
+    """Get a page of saved repositories for the user (keyset paginated, optionally filtered)"""
     if 'user_id' not in session:
         return jsonify({"error": "Not authenticated"}), 401
     
+    limit = min(max(request.args.get('limit', SAVED_PAGE_SIZE, type=int), 1), MAX_SAVED_PAGE_SIZE)
+    q = request.args.get('q', '').strip()
+    cursor = request.args.get('cursor')
+    
     try:
-        conn = sqlite3.connect('reporetriever.db')
-        c = conn.cursor()
-        
-        c.execute('''SELECT id, repo_data, user_note, saved_at
-                     FROM saved_repos
-                     WHERE user_id = ?
-                     ORDER BY saved_at DESC''',
-                  (session['user_id'],))
-        
-        rows = c.fetchall()
-        conn.close()
-        
-        saved_repos = []
-        for row in rows:
-            saved_repos.append({
-                'id': row[0],
-                'repo': json.loads(row[1]),
-                'note': row[2],
-                'saved_at': row[3]
-            })
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        with db.connection() as conn:
+            # Fetch one extra row to know whether another page exists
+            rows = db.list_saved_repos(conn, session['user_id'], limit + 1, after=after, q=q)
+        
+        page = rows[:limit]
+        next_cursor = encode_cursor(page[-1][3], page[-1][0]) if len(rows) > limit else None
         
-        return jsonify({"repos": saved_repos})
+        return jsonify({
+            "repos": [saved_repo_row(row) for row in page],
+            "next_cursor": next_cursor
+        })
         
     except Exception as e:
-        print(f"Fetch error: {e}")
+        log.error("Fetch error: %s", e)
         return jsonify({"error": "Failed to fetch saved repositories"}), 500
 
-@app.route('/repos/unsave/<int:saved_id>', methods=['DELETE'])
-def unsave_repo(saved_id):
-    """Remove a saved repository"""
+def validate_repo(repo):
+    """Raise ValueError unless repo is a repository object that can be saved"""
+    if not isinstance(repo, dict) or type(repo.get('id')) is not int:
+        raise ValueError("repo.id must be an integer")
+    if repo.get('owner') is not None and not isinstance(repo['owner'], dict):
+        raise ValueError("repo.owner must be an object")
+    # These become column values, which SQLite cannot bind as objects or arrays
+    if any(isinstance(value, (dict, list)) for value in db.saved_repo_fields(repo)):
+        raise ValueError("repo fields such as name and owner.login must not be objects or arrays")
+
+def parse_import_line(line):
+    """(repo, note, saved_at) from one NDJSON import line; raises ValueError if unusable"""
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    
+    # Lines from /repos/export wrap the repo; a bare GitHub repository payload works too
+    repo = record['repo'] if 'repo' in record else record
+    validate_repo(repo)
+    
+    note = record.get('note') or ''
+    if not isinstance(note, str):
+        raise ValueError("note must be a string")
+    
+    saved_at = record.get('saved_at')
+    if saved_at is not None and not (isinstance(saved_at, str) and SAVED_AT_PATTERN.fullmatch(saved_at)):
+        raise ValueError("saved_at must look like 'YYYY-MM-DD HH:MM:SS'")
+    return repo, note, saved_at
+
+@bp.route('/repos/import', methods=['POST'])
+def import_repos():
+    """Save repositories from an NDJSON upload, one transaction per IMPORT_BATCH_SIZE lines"""
     if 'user_id' not in session:
         return jsonify({"error": "Not authenticated"}), 401
     
+    user_id = session['user_id']
+    imported = duplicates = invalid = 0
+    errors = []
+    
+    def entries():
+        # Read the body a line at a time, so memory stays bounded by one batch.
+        # request.stream is unbuffered: iterating it directly reads byte by byte.
+        nonlocal invalid
+        body = io.BufferedReader(request.stream, 64 * 1024)
+        for number, line in enumerate(body, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield parse_import_line(line)
+            except ValueError as e:
+                invalid += 1
+                if len(errors) < MAX_IMPORT_ERRORS:
+                    errors.append({"line": number, "error": str(e)})
+    
+    lines = entries()
     try:
-        conn = sqlite3.connect('reporetriever.db')
-        c = conn.cursor()
+        while batch := list(islice(lines, IMPORT_BATCH_SIZE)):
+            with db.connection() as conn:
+                inserted = db.insert_saved_repos(conn, user_id, batch)
+            imported += inserted
+            duplicates += len(batch) - inserted
+    except Exception as e:
+        # Batches already committed stay saved; a retry skips them as duplicates
+        log.error("Import error: %s", e)
+        return jsonify({"error": "Failed to import repositories", "imported": imported}), 500
+    
+    log.info("Imported %d repositories (%d duplicates, %d invalid lines)", imported, duplicates, invalid)
+    return jsonify({
+        "success": True,
+        "imported": imported,
+        "duplicates": duplicates,
+        "invalid": invalid,
+        "errors": errors
+    })
+
+def export_line(row):
+    """NDJSON line for a saved_repos row, shaped like saved_repo_row"""
+    # repo_data is already JSON, so it is spliced in rather than decoded and re-encoded
+    return f'{{"id": {row[0]}, "repo": {row[1]}, "note": {json.dumps(row[2])}, "saved_at": {json.dumps(row[3])}}}\n'
+
+@bp.route('/repos/export', methods=['GET'])
+def export_repos():
+    """Stream every saved repository as NDJSON, in the format /repos/import reads"""
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    user_id = session['user_id']
+    
+    def generate():
+        exported = 0
+        try:
+            with db.connection() as conn:
+                for rows in db.iter_saved_repos(conn, user_id, EXPORT_BATCH_SIZE):
+                    exported += len(rows)
+                    yield ''.join(export_line(row) for row in rows)
+        except sqlite3.Error as e:
+            # Headers are already sent; the client sees a truncated file
+            log.error("Export error after %d repositories: %s", exported, e)
+            return
+        log.info("Exported %d repositories", exported)
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = 'attachment; filename="saved-repos.ndjson"'
+    return response
+
+@bp.route('/repos/saved/search', methods=['GET'])
+def search_saved_repos():
+    """Full-text search over the user's saved repos and notes, ranked by relevance"""
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({"error": "Query is required"}), 400
+    
+    limit = min(max(request.args.get('limit', SAVED_PAGE_SIZE, type=int), 1), MAX_SAVED_PAGE_SIZE)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    
+    try:
+        with db.connection() as conn:
+            rows = db.search_saved_repos(conn, session['user_id'], q, limit + 1, offset)
         
-        c.execute('''DELETE FROM saved_repos
-                     WHERE id = ? AND user_id = ?''',
-                  (saved_id, session['user_id']))
+        return jsonify({
+            "repos": [saved_repo_row(row) for row in rows[:limit]],
+            "next_offset": offset + limit if len(rows) > limit else None
+        })
         
-        conn.commit()
-        conn.close()
+    except Exception as e:
+        log.error("Saved search error: %s", e)
+        return jsonify({"error": "Failed to search saved repositories"}), 500
+
+@bp.route('/repos/unsave/<int:saved_id>', methods=['DELETE'])
+def unsave_repo(saved_id):
+    """Remove a saved repository"""
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    try:
+        with db.connection() as conn:
+            conn.execute('''DELETE FROM saved_repos
+                            WHERE id = ? AND user_id = ?''',
+                         (saved_id, session['user_id']))
         
         return jsonify({"success": True})
         
     except Exception as e:
-        print(f"Delete error: {e}")
+        log.error("Delete error: %s", e)
         return jsonify({"error": "Failed to delete repository"}), 500
 
-@app.route('/repos/check/<int:repo_id>', methods=['GET'])
+@bp.route('/repos/check/<int:repo_id>', methods=['GET'])
 def check_if_saved(repo_id):
     """Check if a repository is already saved by the user"""
     if 'user_id' not in session:
         return jsonify({"saved": False})
     
     try:
-        conn = sqlite3.connect('reporetriever.db')
-        c = conn.cursor()
-        
-        # Check by repo id in the saved repo_data JSON
-        c.execute('''SELECT id FROM saved_repos WHERE user_id = ?''',
-                  (session['user_id'],))
-        
-        rows = c.fetchall()
-        conn.close()
-        
-        for row in rows:
-            # This is a simple check - you might want to optimize this
-            pass
+        with db.connection() as conn:
+            row = conn.execute('''SELECT id FROM saved_repos
+                                   WHERE user_id = ? AND github_repo_id = ?''',
+                               (session['user_id'], repo_id)).fetchone()
         
+        if row:
+            return jsonify({"saved": True, "saved_id": row[0]})
         return jsonify({"saved": False})
         
     except Exception as e:
+        log.error("Check error: %s", e)
         return jsonify({"saved": False})
 
+@bp.route('/repos/check', methods=['POST'])
+def check_if_saved_batch():
+    """Check which of a page of repositories are already saved, in one query"""
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    repo_ids = data.get('repo_ids') or []
+    
+    if not isinstance(repo_ids, list) or len(repo_ids) > MAX_BATCH_CHECK:
+        return jsonify({"error": f"repo_ids must be a list of at most {MAX_BATCH_CHECK} ids"}), 400
+    
+    if 'user_id' not in session:
+        return jsonify({"saved": {}})
+    
+    try:
+        with db.connection() as conn:
+            saved_ids = db.find_saved_ids(conn, session['user_id'], [int(i) for i in repo_ids])
+        
+        return jsonify({"saved": {str(repo_id): saved_id for repo_id, saved_id in saved_ids.items()}})
+        
+    except (TypeError, ValueError):
+        return jsonify({"error": "repo_ids must be integers"}), 400
+    except Exception as e:
+        log.error("Check error: %s", e)
+        return jsonify({"saved": {}})
+
+def create_app(init_database=True):
+    """Build the Flask app; init_database=False when migrations already ran (gunicorn master)"""
+    app = Flask(__name__)
+    app.secret_key = os.getenv('SECRET_KEY', secrets.token_hex(32))
+    
+    # Configure persistent sessions (SESSION_BACKEND: sqlite, cookie or filesystem)
+    app.config['SESSION_PERMANENT'] = True
+    app.config['SESSION_FILE_DIR'] = './flask_session'
+    app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+    app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
+    
+    init_sessions(app)
+    CORS(app, supports_credentials=True)  # Enable CORS for frontend requests
+    telemetry.init_app(app)  # Request ids and per-endpoint latency
+    assets.init_app(app)  # Gzip large JSON responses
+    app.register_blueprint(bp)
+    
+    if init_database:
+        db.init_db()
+    
+    # With several workers only the one holding the prefetch lock runs cycles
+    if PREFETCH_ENABLED:
+        prefetcher.start()
+    return app
+
 if __name__ == '__main__':
     # Check if required environment variables are set
     if not GITHUB_TOKEN:
@@ -564,9 +1309,9 @@ if __name__ == '__main__':
     print("🚀 Starting RepoRetriever backend...")
     print("🧠 Using smart keyword matching (no AI costs!)")
     print("🔐 OAuth authentication enabled" if (GITHUB_CLIENT_ID and GITHUB_CLIENT_SECRET) else "🔓 OAuth not configured")
-    print(f"💾 Session type: {app.config.get('SESSION_TYPE')}")
-    print(f"📁 Session directory: {app.config.get('SESSION_FILE_DIR')}")
+    print(f"💾 Session backend: {SESSION_BACKEND}")
     print("📍 Frontend available at: http://localhost:5000")
     print("🔍 API endpoint: http://localhost:5000/search")
     
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # Development server only; production runs gunicorn -c gunicorn.conf.py wsgi:app
+    create_app().run(debug=os.getenv('FLASK_DEBUG', '1').lower() in ('1', 'true', 'yes'), port=5000)
\ No newline at end of file
@@ -0,0 +1,92 @@
+import gzip
+import hashlib
+import os
+import threading
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip variants are built
+    brotli = None
+
+# JSON responses at least this large are gzipped for clients that accept it
+JSON_COMPRESS_MIN_BYTES = int(os.getenv('JSON_COMPRESS_MIN_BYTES', '1024'))
+JSON_COMPRESS_LEVEL = int(os.getenv('JSON_COMPRESS_LEVEL', '5'))  # cheap enough to do per response
+
+
+class StaticAsset:
+    """A file served from memory with a strong ETag and pre-compressed br/gzip variants"""
+
+    def __init__(self, path, mimetype, cache_control):
+        self.path = path
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self._variants = None  # content encoding -> (etag, body)
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Read the file and build every variant once (best compression: it is done ahead of time)"""
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        if self.mimetype.startswith('text/'):
+            data.decode('utf-8')  # raise UnicodeDecodeError now rather than serve mojibake
+        digest = hashlib.sha256(data).hexdigest()[:32]
+
+        variants = {'identity': (digest, data)}
+        compressed = {'gzip': gzip.compress(data, 9, mtime=0)}
+        if brotli is not None:
+            compressed['br'] = brotli.compress(data, quality=11)
+        for encoding, body in compressed.items():
+            if len(body) < len(data):
+                variants[encoding] = (f'{digest}-{encoding}', body)
+
+        with self._lock:
+            self._variants = variants
+            self._mtime = mtime
+
+    def variants(self, reload=False):
+        """Variants from memory; with reload, re-read first if the file changed on disk"""
+        if self._variants is None or (reload and os.stat(self.path).st_mtime_ns != self._mtime):
+            self.load()
+        return self._variants
+
+    def response(self, reload=False):
+        """Serve the best variant the client accepts, or 304 if it already has it"""
+        variants = self.variants(reload)
+        encoding = next((name for name in ('br', 'gzip')
+                         if name in variants and request.accept_encodings[name] > 0), 'identity')
+        etag, body = variants[encoding]
+
+        # Any variant's tag means the client's copy is current
+        if any(request.if_none_match.contains_weak(tag) for tag, _ in variants.values()):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype=self.mimetype)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = self.cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+def init_app(app):
+    """Gzip large JSON responses for clients that accept it"""
+
+    @app.after_request
+    def compress_json(response):
+        if (response.mimetype != 'application/json' or response.is_streamed
+                or response.direct_passthrough or 'Content-Encoding' in response.headers):
+            return response
+        data = response.get_data()
+        if len(data) < JSON_COMPRESS_MIN_BYTES:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if request.accept_encodings['gzip'] > 0:
+            response.set_data(gzip.compress(data, JSON_COMPRESS_LEVEL))
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
@@ -0,0 +1,81 @@
+"""Concurrent save/list throughput: connect-per-request vs the pooled WAL layer
+
+Run from the project root:
+    python benchmarks/bench_db.py [threads] [ops_per_thread]
+"""
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import db
+
+REPO = json.dumps({"id": 1, "full_name": "octo/repo", "description": "x" * 400})
+
+def legacy_save(path, user_id):
+    conn = sqlite3.connect(path)
+    conn.execute('INSERT INTO saved_repos (user_id, repo_data, user_note) VALUES (?, ?, ?)',
+                 (user_id, REPO, ''))
+    conn.commit()
+    conn.close()
+
+def legacy_list(path, user_id):
+    conn = sqlite3.connect(path)
+    rows = conn.execute('SELECT id, repo_data, user_note, saved_at FROM saved_repos '
+                        'WHERE user_id = ? ORDER BY saved_at DESC LIMIT 50', (user_id,)).fetchall()
+    conn.close()
+    return rows
+
+def pooled_save(pool, user_id):
+    with pool.connection() as conn:
+        conn.execute('INSERT INTO saved_repos (user_id, repo_data, user_note) VALUES (?, ?, ?)',
+                     (user_id, REPO, ''))
+
+def pooled_list(pool, user_id):
+    with pool.connection() as conn:
+        return conn.execute('SELECT id, repo_data, user_note, saved_at FROM saved_repos '
+                            'WHERE user_id = ? ORDER BY saved_at DESC LIMIT 50', (user_id,)).fetchall()
+
+def run(label, save, listing, target, threads, ops):
+    """Each thread alternates one save with three lists"""
+    errors = []
+
+    def worker(user_id):
+        for i in range(ops):
+            try:
+                if i % 4 == 0:
+                    save(target, user_id)
+                else:
+                    listing(target, user_id)
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(worker, range(threads)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {threads * ops / elapsed:8.0f} ops/s  errors: {len(errors)}")
+
+if __name__ == '__main__':
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    ops = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.db')
+        conn = sqlite3.connect(legacy_path)
+        conn.execute('CREATE TABLE saved_repos (id INTEGER PRIMARY KEY, user_id INTEGER, repo_data TEXT, '
+                     'user_note TEXT, saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)')
+        conn.close()
+        run("connect per request", legacy_save, legacy_list, legacy_path, threads, ops)
+
+        pool = db.ConnectionPool(os.path.join(tmp, 'pooled.db'))
+        with pool.connection() as conn:
+            conn.execute('CREATE TABLE saved_repos (id INTEGER PRIMARY KEY, user_id INTEGER, repo_data TEXT, '
+                         'user_note TEXT, saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)')
+        run("pooled WAL", pooled_save, pooled_list, pool, threads, ops)
+        pool.close_all()
@@ -0,0 +1,97 @@
+"""Build, load and scoring cost of the query-expansion model (expansion.py)
+
+Builds a model from a synthetic corpus: each repository is drawn from one
+theme (a TOPIC_MAPPING phrase and its keywords), plus a language and filler
+words, so terms co-occur the way they do in real GitHub data. It reports the
+build time, file size and first-load time, and the per-query conversion
+latency with the model, then shows the keywords chosen for the load-test
+queries. Keyword quality on real data depends on the harvested corpus, so
+build from your own database before judging it:
+    python expansion.py --db reporetriever.db
+Run from the project root:
+    python benchmarks/bench_expansion.py [--repos N] [--rounds N]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+from fake_github import LANGUAGES, WORDS
+from load_test import QUERIES
+
+
+def synthetic_corpus(topic_mapping, count, seed=1):
+    """(topics, text) documents, each about one theme"""
+    rng = random.Random(seed)
+    themes = list(topic_mapping.items())
+    for _ in range(count):
+        phrase, keywords = rng.choice(themes)
+        language = rng.choice(LANGUAGES)
+        topics = rng.sample(keywords, min(len(keywords), rng.randint(1, 3))) + [language.lower()]
+        words = phrase.split() + rng.sample(keywords, 1) + [rng.choice(WORDS) for _ in range(6)]
+        rng.shuffle(words)
+        yield topics, f"{rng.choice(WORDS)}-{rng.choice(WORDS)} A {language} " + ' '.join(words)
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repos', type=int, default=50000, help="repositories in the synthetic corpus")
+    parser.add_argument('--rounds', type=int, default=200, help="times each query is converted")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    model_path = os.path.join(tmp, 'query_expansion.bin')
+    os.environ.update({
+        'DATABASE_PATH': os.path.join(tmp, 'bench.db'),
+        'QUERY_EXPANSION_PATH': model_path,
+        'PREFETCH_ENABLED': '0',
+        'LOG_LEVEL': 'WARNING'
+    })
+    import app as app_module
+    import expansion
+
+    started = time.perf_counter()
+    expansion.write(model_path, *expansion.build(synthetic_corpus(app_module.TOPIC_MAPPING, args.repos)))
+    build_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    model = expansion.get_model()
+    load_ms = (time.perf_counter() - started) * 1000
+    print(f"{args.repos} repos: built in {build_s:.1f} s, {os.path.getsize(model_path) / 1024:.0f} KB, "
+          f"{len(model.terms)} terms, {len(model.ids)} associations, loaded in {load_ms:.2f} ms")
+
+    convert, variants = [], []
+    for _ in range(args.rounds):
+        for query in QUERIES:
+            started = time.perf_counter()
+            params = app_module.smart_query_converter(query)
+            convert.append((time.perf_counter() - started) * 1e6)
+            started = time.perf_counter()
+            app_module.query_variants(query, params)
+            variants.append((time.perf_counter() - started) * 1e6)
+    for label, samples in (("smart_query_converter", convert), ("query_variants", variants)):
+        print(f"{label:<22} p50 {percentile(samples, 50):7.1f} us   p99 {percentile(samples, 99):7.1f} us")
+
+    print()
+    for query in QUERIES[:10]:
+        params = app_module.smart_query_converter(query)
+        expanded = [variant['keywords'] for variant in app_module.query_variants(query, params)[1:]]
+        print(f"{query:<42} {' '.join(params['keywords']):<32} variants: {expanded}")
+
+    app_module.db.pool.close_all()
+    shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Latency of one-off requests.get calls vs the pooled GitHub session
+
+Starts a local stub of the GitHub search endpoint and reports p50/p99 for
+both clients. Run from the project root:
+    python benchmarks/bench_http_session.py [requests] [threads]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from github_client import create_session
+
+PAYLOAD = json.dumps({
+    "total_count": 12,
+    "items": [{"id": i, "full_name": f"octo/repo-{i}", "stargazers_count": 1000 - i} for i in range(12)]
+}).encode()
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every GET like the search endpoint, with keep-alive"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def run(label, get, url, total, threads):
+    """Issue total GETs from a thread pool and print latency percentiles"""
+    def timed(_):
+        start = time.perf_counter()
+        get(url, params={"q": "python", "per_page": 12}).json()
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(timed, range(threads)))  # warm up
+        start = time.perf_counter()
+        samples = list(pool.map(timed, range(total)))
+        elapsed = time.perf_counter() - start
+
+    print(f"{label:<16} p50 {percentile(samples, 50):6.2f} ms  "
+          f"p99 {percentile(samples, 99):6.2f} ms  {total / elapsed:8.0f} req/s")
+
+if __name__ == '__main__':
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/search/repositories"
+
+    run("requests.get", requests.get, url, total, threads)
+    run("pooled session", create_session().get, url, total, threads)
+    server.shutdown()
@@ -0,0 +1,130 @@
+"""Bulk import/export of saved repositories against one-request-per-repo saving
+
+Writes N synthetic repositories to an NDJSON file, then through the Flask
+test client: saves a sample one at a time with POST /repos/save (the only
+way before /repos/import) and extrapolates to N, imports the whole file with
+POST /repos/import (streamed from disk), imports it again (all duplicates),
+and streams it back out of GET /repos/export. Peak Python allocations are
+measured with tracemalloc in a separate pass, since tracing slows the run.
+Run from the project root:
+    python benchmarks/bench_import.py [--repos N] [--sample N]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+from fake_github import synthetic_repo
+
+
+def write_ndjson(path, count, seed):
+    """count distinct synthetic repos in /repos/export's line format"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for n in range(count):
+            repo = synthetic_repo(rng)
+            repo['id'] = n + 1
+            f.write(json.dumps({"repo": repo, "note": f"note {n}"}) + '\n')
+    return os.path.getsize(path)
+
+
+def signed_in_client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return client
+
+
+def import_file(client, path):
+    with open(path, 'rb') as f:
+        response = client.post('/repos/import', input_stream=f, content_length=os.path.getsize(path),
+                               content_type='application/x-ndjson')
+    return response.get_json()
+
+
+def export_all(client):
+    """Stream the export, keeping only its size and line count"""
+    response = client.get('/repos/export', buffered=False)
+    size = lines = 0
+    for chunk in response.response:
+        size += len(chunk)
+        lines += chunk.count(b'\n')
+    response.close()
+    return size, lines
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def peak_mb(fn, *args):
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repos', type=int, default=50000, help="repositories in the import file")
+    parser.add_argument('--sample', type=int, default=2000, help="repositories saved one request at a time")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        'DATABASE_PATH': os.path.join(tmp, 'bench.db'),
+        'PREFETCH_ENABLED': '0',
+        'LOG_LEVEL': 'WARNING'
+    })
+    import app as app_module
+    app = app_module.create_app()
+
+    path = os.path.join(tmp, 'repos.ndjson')
+    file_mb = write_ndjson(path, args.repos, seed=1) / 2**20
+    print(f"{args.repos} repos, {file_mb:.1f} MB of NDJSON; "
+          f"{app_module.IMPORT_BATCH_SIZE} rows per import transaction")
+    print(f"{'':<28} {'seconds':>8} {'repos/s':>9} {'peak MB':>8}")
+
+    def row(label, seconds, count, peak=None):
+        peak_text = f"{peak:>8.1f}" if peak is not None else f"{'-':>8}"
+        print(f"{label:<28} {seconds:>8.2f} {count / seconds:>9.0f} {peak_text}")
+
+    # Before: one POST /repos/save per repo
+    client = signed_in_client(app, 1)
+    with open(path, encoding='utf-8') as f:
+        sample = [json.loads(next(f)) for _ in range(min(args.sample, args.repos))]
+    seconds, _ = timed(lambda: [client.post('/repos/save', json=body) for body in sample])
+    row(f"/repos/save x {len(sample)}", seconds, len(sample))
+    row(f"  extrapolated to {args.repos}", seconds * args.repos / len(sample), args.repos)
+
+    # After: one streamed upload
+    client = signed_in_client(app, 2)
+    seconds, result = timed(import_file, client, path)
+    assert result['imported'] == args.repos, result
+    row("/repos/import", seconds, args.repos, peak_mb(import_file, signed_in_client(app, 3), path))
+
+    seconds, result = timed(import_file, client, path)
+    assert result['duplicates'] == args.repos, result
+    row("/repos/import (duplicates)", seconds, args.repos)
+
+    seconds, (size, lines) = timed(export_all, client)
+    assert lines == args.repos, lines
+    row(f"/repos/export ({size / 2**20:.1f} MB)", seconds, lines, peak_mb(export_all, client))
+
+    app_module.db.pool.close_all()
+    shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Micro-benchmark for smart_query_converter and the compiled phrase matcher
+
+Run from the project root:
+    python benchmarks/bench_query_converter.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import PhraseMatcher, smart_query_converter, TOPIC_MAPPING
+
+QUERIES = [
+    "Python web scraping library for beginners",
+    "Popular React dashboard components",
+    "JavaScript game engine for 2D games",
+    "Docker configuration for Node.js",
+    "Lightweight JSON parser",
+    "Active authentication library",
+    "mature stable production kubernetes operator written in golang",
+]
+
+def per_call_us(func, number):
+    """Best-of-five time per call in microseconds"""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+def bench_converter():
+    """Time the full conversion over the sample queries"""
+    def run():
+        for query in QUERIES:
+            smart_query_converter(query)
+    us = per_call_us(run, 2000) / len(QUERIES)
+    print(f"smart_query_converter: {us:8.2f} us/query")
+
+def bench_table_growth():
+    """Compare the automaton with a per-phrase substring scan as the table grows"""
+    query = "looking for a popular python web scraping library with good docs"
+    print(f"{'phrases':>8} {'substring scan':>16} {'automaton':>12}")
+    for extra in (0, 100, 1000, 10000):
+        phrases = list(TOPIC_MAPPING) + [f"synthetic topic {i}" for i in range(extra)]
+        matcher = PhraseMatcher(phrases)
+        scan_us = per_call_us(lambda: [p for p in phrases if p in query], 200)
+        matcher_us = per_call_us(lambda: matcher.find(query), 200)
+        print(f"{len(phrases):>8} {scan_us:>13.2f} us {matcher_us:>9.2f} us")
+
+if __name__ == '__main__':
+    bench_converter()
+    bench_table_growth()
@@ -0,0 +1,104 @@
+"""Size and serialization cost of full GitHub payloads vs the slim repository record
+
+Run from the project root:
+    python benchmarks/bench_repo_projection.py [saved_repos]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import db
+
+API = "https://api.github.com/repos/octo/repo-{i}"
+URL_FIELDS = [
+    'forks_url', 'keys_url', 'collaborators_url', 'teams_url', 'hooks_url', 'issue_events_url',
+    'events_url', 'assignees_url', 'branches_url', 'tags_url', 'blobs_url', 'git_tags_url',
+    'git_refs_url', 'trees_url', 'statuses_url', 'languages_url', 'stargazers_url',
+    'contributors_url', 'subscribers_url', 'subscription_url', 'commits_url', 'git_commits_url',
+    'comments_url', 'issue_comment_url', 'contents_url', 'compare_url', 'merges_url',
+    'archive_url', 'downloads_url', 'issues_url', 'pulls_url', 'milestones_url',
+    'notifications_url', 'labels_url', 'releases_url', 'deployments_url'
+]
+OWNER_URL_FIELDS = [
+    'avatar_url', 'url', 'html_url', 'followers_url', 'following_url', 'gists_url',
+    'starred_url', 'subscriptions_url', 'organizations_url', 'repos_url', 'events_url',
+    'received_events_url'
+]
+
+def github_item(i):
+    """A search result item shaped like GitHub's, with all of its URL fields"""
+    item = {field: f"{API.format(i=i)}/{field[:-4]}{{/id}}" for field in URL_FIELDS}
+    item.update({
+        "id": i, "node_id": f"MDEwOlJlcG9zaXRvcnk{i:08d}", "name": f"repo-{i}",
+        "full_name": f"octo/repo-{i}", "private": False, "html_url": f"https://github.com/octo/repo-{i}",
+        "description": "A fast, well-tested library for doing useful things in production systems.",
+        "fork": False, "url": API.format(i=i), "created_at": "2015-01-01T00:00:00Z",
+        "updated_at": "2026-01-01T00:00:00Z", "pushed_at": "2026-01-01T00:00:00Z",
+        "git_url": f"git://github.com/octo/repo-{i}.git", "ssh_url": f"git@github.com:octo/repo-{i}.git",
+        "clone_url": f"https://github.com/octo/repo-{i}.git", "svn_url": f"https://github.com/octo/repo-{i}",
+        "homepage": "https://example.com", "size": 12345, "stargazers_count": 5000 + i,
+        "watchers_count": 5000 + i, "language": "Python", "has_issues": True, "has_projects": True,
+        "has_downloads": True, "has_wiki": True, "has_pages": False, "forks_count": 300,
+        "mirror_url": None, "archived": False, "disabled": False, "open_issues_count": 42,
+        "license": {"key": "mit", "name": "MIT License", "spdx_id": "MIT",
+                    "url": "https://api.github.com/licenses/mit", "node_id": "MDc6TGljZW5zZTEz"},
+        "allow_forking": True, "is_template": False, "topics": ["python", "library", "tools"],
+        "visibility": "public", "forks": 300, "open_issues": 42, "watchers": 5000 + i,
+        "default_branch": "main", "score": 1.0
+    })
+    item["owner"] = {field: f"https://api.github.com/users/octo/{field}" for field in OWNER_URL_FIELDS}
+    item["owner"].update({"login": "octo", "id": 1, "node_id": "MDQ6VXNlcjE=", "type": "User",
+                          "gravatar_id": "", "site_admin": False})
+    return item
+
+def saved_page_ms(path):
+    """Time to load and serialize every saved repo, as /repos/saved does"""
+    conn = db.open_connection(path)
+    start = time.perf_counter()
+    rows = conn.execute('SELECT id, repo_data, user_note, saved_at FROM saved_repos WHERE user_id = 1 '
+                        'ORDER BY saved_at DESC').fetchall()
+    body = json.dumps({"repos": [{'id': r[0], 'repo': json.loads(r[1]), 'note': r[2], 'saved_at': r[3]}
+                                 for r in rows]})
+    elapsed = (time.perf_counter() - start) * 1000
+    conn.close()
+    return elapsed, len(body)
+
+def build_db(path, items, slim):
+    """Create the schema and save every item for one user"""
+    pool = db.ConnectionPool(path, size=1)
+    with pool.connection() as conn:
+        conn.execute('''CREATE TABLE saved_repos
+                        (id INTEGER PRIMARY KEY, user_id INTEGER, repo_data TEXT, user_note TEXT,
+                         saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+        db._migrate_saved_repo_columns(conn)
+        for item in items:
+            if slim:
+                db.insert_saved_repo(conn, 1, item, '')
+            else:
+                conn.execute('INSERT INTO saved_repos (user_id, repo_data, user_note) VALUES (1, ?, ?)',
+                             (json.dumps(item), ''))
+    with pool.connection() as conn:
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    pool.close_all()
+    return os.path.getsize(path)
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    items = [github_item(i) for i in range(count)]
+
+    page = items[:12]
+    full_page = len(json.dumps({"repositories": page}))
+    slim_page = len(json.dumps({"repositories": [db.slim_repo(item) for item in page]}))
+    print(f"/search response (12 items): full {full_page / 1024:7.1f} KB   slim {slim_page / 1024:7.1f} KB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, slim in (("full", False), ("slim", True)):
+            path = os.path.join(tmp, f"{label}.db")
+            size = build_db(path, items, slim)
+            elapsed, body = saved_page_ms(path)
+            print(f"{label}: DB {size / 1024 / 1024:6.1f} MB   /repos/saved {body / 1024 / 1024:6.1f} MB "
+                  f"in {elapsed:7.1f} ms ({count} saved repos)")
@@ -0,0 +1,86 @@
+"""Saved-repo search latency: FTS5 (bm25, prefix) vs a LIKE scan
+
+Rows are spread over several users and one user's repos are searched, since
+the full-text index holds every user's saved repos. Compares the LIKE scan
+/repos/saved?q= used to run with its FTS5 filter (newest first) and with the
+ranked /repos/saved/search.
+Run from the project root:
+    python benchmarks/bench_saved_search.py [rows] [users]
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+TMP = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(TMP, 'bench.db')
+
+import db
+
+WORDS = ("fast async web http client server parser json yaml cli terminal game engine graphics "
+         "render neural network training data pipeline stream queue cache store database orm "
+         "auth token crypto wallet chart plot dashboard admin mobile android ios docker cloud").split()
+LANGUAGES = ["Python", "JavaScript", "Go", "Rust", "Java", "TypeScript", "C++", "Ruby"]
+
+def synthetic_repo(rng, i):
+    return {
+        "id": i,
+        "name": f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{i}",
+        "full_name": f"owner{i % 977}/{i}",
+        "description": ' '.join(rng.choice(WORDS) for _ in range(12)),
+        "language": rng.choice(LANGUAGES),
+        "topics": rng.sample(WORDS, 3),
+        "stargazers_count": rng.randint(0, 50000),
+        "owner": {"login": f"owner{i % 977}"}
+    }
+
+def like_scan(conn, user_id, q, limit):
+    """/repos/saved?q= as it was: a substring scan down the user's newest-first index"""
+    pattern = '%' + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    return conn.execute('''SELECT id, repo_data, user_note, saved_at
+                            FROM saved_repos
+                            WHERE user_id = ?
+                              AND (name LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\'
+                                   OR language LIKE ? ESCAPE '\\' OR user_note LIKE ? ESCAPE '\\')
+                            ORDER BY saved_at DESC, id DESC
+                            LIMIT ?''', (user_id, *[pattern] * 4, limit)).fetchall()
+
+def timed_ms(fn, repeat=20):
+    """Median wall time of fn in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)[len(samples) // 2]
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rng = random.Random(42)
+
+    db.init_db()
+    start = time.perf_counter()
+    with db.connection() as conn:
+        for i in range(rows):
+            db.insert_saved_repo(conn, i % users + 1, synthetic_repo(rng, i), rng.choice(WORDS) if i % 5 == 0 else '')
+        # A handful of rare matches so the LIKE scan cannot stop early
+        for i in range(rows, rows + 5):
+            db.insert_saved_repo(conn, 1, dict(synthetic_repo(rng, i), description="zeppelin orchestration"), '')
+            db.insert_saved_repo(conn, 2, dict(synthetic_repo(rng, i), description="zeppelin orchestration"), '')
+    print(f"loaded {rows} rows for {users} users in {time.perf_counter() - start:.1f} s; searching user 1")
+
+    print(f"{'query':<24} {'LIKE scan':>12} {'FTS5 filter':>12} {'FTS5 ranked':>12}")
+    with db.connection() as conn:
+        for query in ("zeppelin", "zepp", "neural network", "dashboard admin", "data", "python"):
+            like_ms = timed_ms(lambda: like_scan(conn, 1, query, 50))
+            filter_ms = timed_ms(lambda: db.list_saved_repos(conn, 1, 50, q=query))
+            fts_ms = timed_ms(lambda: db.search_saved_repos(conn, 1, query, 50))
+            print(f"{query:<24} {like_ms:>9.2f} ms {filter_ms:>9.2f} ms {fts_ms:>9.2f} ms")
+
+    db.pool.close_all()
+    shutil.rmtree(TMP)
@@ -0,0 +1,107 @@
+"""Auth-check latency and disk usage per session backend: filesystem vs SQLite vs signed cookie
+
+Run from the project root:
+    python benchmarks/bench_sessions.py [sessions]
+"""
+import os
+import random
+import secrets
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+TMP = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(TMP, 'bench.db')
+
+from flask import Flask, jsonify, session
+
+import db
+from sessions import init_sessions
+
+PAYLOAD = {'user_id': 1, 'username': 'octocat', 'github_id': 583231, '_permanent': True}
+
+def create_app(backend, sessions):
+    app = Flask(__name__)
+    app.secret_key = 'bench'
+    app.config['SESSION_PERMANENT'] = True
+    app.config['SESSION_FILE_DIR'] = os.path.join(TMP, 'flask_session')
+    app.config['SESSION_FILE_THRESHOLD'] = sessions + 1  # keep every session on disk
+    init_sessions(app, backend)
+
+    @app.route('/auth/user')
+    def get_user():
+        if 'user_id' in session:
+            return jsonify({"logged_in": True, "user_id": session['user_id'], "username": session.get('username')})
+        return jsonify({"logged_in": False})
+
+    return app
+
+def populate(app, backend, sessions):
+    """Write sessions directly into the store and return their cookie values"""
+    sids = [secrets.token_urlsafe(32) for _ in range(sessions)]
+    lifetime = app.permanent_session_lifetime.total_seconds()
+    if backend == 'sqlite':
+        expires_at = time.time() + lifetime
+        data = app.session_interface.serializer.dumps(PAYLOAD)
+        with db.connection() as conn:
+            conn.executemany('INSERT INTO sessions (id, data, expires_at) VALUES (?, ?, ?)',
+                             ((sid, data, expires_at) for sid in sids))
+    elif backend == 'filesystem':
+        interface = app.session_interface
+        for sid in sids:
+            interface.cache.set(interface.key_prefix + sid, dict(PAYLOAD), int(lifetime))
+    else:
+        serializer = app.session_interface.get_signing_serializer(app)
+        sids = [serializer.dumps(dict(PAYLOAD, user_id=i)) for i in range(min(sessions, 1000))]
+    return sids
+
+def allocated(path):
+    return os.stat(path).st_blocks * 512
+
+def disk_bytes(backend):
+    """Bytes allocated on disk, which for small files is a whole block each"""
+    if backend == 'sqlite':
+        with db.connection() as conn:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return allocated(os.environ['DATABASE_PATH'])
+    if backend == 'filesystem':
+        root = os.path.join(TMP, 'flask_session')
+        return sum(allocated(os.path.join(root, name)) for name in os.listdir(root))
+    return 0
+
+def auth_check_us(client, cookies, requests=2000):
+    """Median and p99 latency of /auth/user in microseconds"""
+    rng = random.Random(7)
+    for _ in range(200):  # warm up
+        client.set_cookie('session', rng.choice(cookies))
+        client.get('/auth/user')
+    samples = []
+    for _ in range(requests):
+        client.set_cookie('session', rng.choice(cookies))
+        start = time.perf_counter()
+        response = client.get('/auth/user')
+        samples.append((time.perf_counter() - start) * 1e6)
+        assert response.json['logged_in']
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+if __name__ == '__main__':
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    db.init_db()
+
+    print(f"{sessions} sessions")
+    print(f"{'backend':<12} {'populate':>10} {'p50':>10} {'p99':>10} {'disk':>10} {'cookie':>8}")
+    for backend in ('filesystem', 'sqlite', 'cookie'):
+        app = create_app(backend, sessions)
+        start = time.perf_counter()
+        cookies = populate(app, backend, sessions)
+        populate_s = time.perf_counter() - start
+        p50, p99 = auth_check_us(app.test_client(), cookies)
+        print(f"{backend:<12} {populate_s:>8.1f} s {p50:>7.0f} us {p99:>7.0f} us "
+              f"{disk_bytes(backend) / 2**20:>7.1f} MB {len(cookies[0]):>6} B")
+
+    db.pool.close_all()
+    shutil.rmtree(TMP)
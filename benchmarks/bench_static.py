@@ -0,0 +1,119 @@
+"""Bytes on the wire and time to first byte for the frontend and JSON responses
+
+Compares the previous way of serving index.html and favicon.png (read from
+disk on every request, sent uncompressed) with the in-memory assets, for a
+browser that accepts br/gzip, a revisit carrying the ETag (304), and a
+/search response with and without JSON compression. Requests go over HTTP
+to a threaded WSGI server backed by the local GitHub stand-in.
+Run from the project root:
+    python benchmarks/bench_static.py [--requests N] [--mbps 10]
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, ROOT)
+
+from fake_github import FakeGitHub
+
+BROWSER = {'Accept-Encoding': 'gzip, deflate, br'}
+IDENTITY = {'Accept-Encoding': 'identity'}
+
+
+def legacy_routes(app):
+    """The routes as they were: a disk read per request and no compression"""
+    from flask import send_from_directory
+
+    @app.route('/legacy/')
+    def legacy_index():
+        with open('index.html', 'r', encoding='utf-8') as f:
+            return f.read()
+
+    @app.route('/legacy/favicon.png')
+    def legacy_favicon():
+        return send_from_directory(os.getcwd(), 'favicon.png', mimetype='image/png')
+
+
+def measure(http, method, url, total, headers, json_body=None):
+    """Median time to first byte and to last byte in ms, wire bytes and final status"""
+    ttfb, ttlb = [], []
+    http.request(method, url, headers=headers, json=json_body).close()  # warm up
+    for _ in range(total):
+        started = time.perf_counter()
+        response = http.request(method, url, headers=headers, json=json_body, stream=True)
+        first = response.raw.read(1)  # raw: undecoded, as it came off the socket
+        ttfb.append((time.perf_counter() - started) * 1000)
+        wire = len(first) + len(response.raw.read())
+        ttlb.append((time.perf_counter() - started) * 1000)
+    ttfb.sort()
+    ttlb.sort()
+    return ttfb[len(ttfb) // 2], ttlb[len(ttlb) // 2], wire, response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help="requests per row")
+    parser.add_argument('--mbps', type=float, default=10, help="link speed for the transfer-time estimate")
+    args = parser.parse_args()
+
+    fake = FakeGitHub(latency=0)
+    fake_url = fake.start()
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        'DATABASE_PATH': os.path.join(tmp, 'bench.db'),
+        'GITHUB_API_URL': fake_url,
+        'GITHUB_WEB_URL': fake_url,
+        'PREFETCH_ENABLED': '0',
+        'LOG_LEVEL': 'WARNING'
+    })
+    os.chdir(ROOT)
+    from werkzeug.serving import make_server
+    import app as app_module
+    import assets
+
+    app = app_module.create_app()
+    legacy_routes(app)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    http = requests.Session()
+
+    etag = http.get(base + '/', headers=BROWSER).headers['ETag']
+    search = {"query": "python web framework", "per_page": 30}
+    rows = [
+        ("index.html  before", 'GET', '/legacy/', BROWSER, None),
+        ("index.html  after", 'GET', '/', BROWSER, None),
+        ("index.html  revisit", 'GET', '/', dict(BROWSER, **{'If-None-Match': etag}), None),
+        ("favicon     before", 'GET', '/legacy/favicon.png', BROWSER, None),
+        ("favicon     after", 'GET', '/favicon.png', BROWSER, None),
+        ("/search     identity", 'POST', '/search', IDENTITY, search),
+        ("/search     gzip", 'POST', '/search', BROWSER, search),
+    ]
+
+    print(f"brotli {'available' if assets.brotli else 'not installed (gzip only)'}, "
+          f"{args.requests} requests per row, transfer estimate at {args.mbps:g} Mbit/s")
+    print(f"{'':<21} {'status':>6} {'encoding':>9} {'bytes':>8} {'ttfb':>9} {'total':>9} {'transfer':>9}")
+    for label, method, path, headers, body in rows:
+        ttfb, ttlb, wire, response = measure(http, method, base + path, args.requests, headers, body)
+        transfer = wire * 8 / (args.mbps * 1e6) * 1000
+        print(f"{label:<21} {response.status_code:>6} {response.headers.get('Content-Encoding', '-'):>9} "
+              f"{wire:>8} {ttfb:>6.2f} ms {ttlb:>6.2f} ms {transfer:>6.2f} ms")
+
+    server.shutdown()
+    fake.stop()
+    app_module.db.pool.close_all()
+    shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Throughput of the production server (gunicorn, gunicorn.conf.py) by worker count
+
+Starts the GitHub stand-in, then for each worker count runs gunicorn with
+that many workers and drives /auth/user and /search (cache-warm) over HTTP.
+Run from the project root:
+    python benchmarks/bench_workers.py [worker counts...] [--requests N] [--concurrency C]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, ROOT)
+
+from fake_github import FakeGitHub
+from load_test import HttpUser, login, run_scenario
+
+def wait_until_up(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url + '/health', timeout=1).ok:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("gunicorn did not come up")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('workers', type=int, nargs='*', default=[1, 2, 4])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--threads', type=int, default=4, help="gthread threads per worker")
+    args = parser.parse_args()
+
+    fake = FakeGitHub(latency=0.05)
+    fake_url = fake.start()
+    tmp = tempfile.mkdtemp()
+    env = dict(os.environ,
+               DATABASE_PATH=os.path.join(tmp, 'bench.db'),
+               GITHUB_API_URL=fake_url,
+               GITHUB_WEB_URL=fake_url,
+               PREFETCH_ENABLED='0',
+               LOG_LEVEL='WARNING',
+               SECRET_KEY='bench',
+               # Shared tier so every worker's cache is warm after the first pass
+               SEARCH_CACHE_PERSIST='1')
+
+    print(f"{os.cpu_count()} CPUs, {args.concurrency} client threads, {args.threads} threads per worker")
+    print(f"{'workers':>7} {'scenario':<8} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'err':>5}")
+    for workers in args.workers:
+        port = 18000 + workers
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-w', str(workers),
+             '--threads', str(args.threads), '-b', f'127.0.0.1:{port}', 'wsgi:app'],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            url = f"http://127.0.0.1:{port}"
+            wait_until_up(url)
+            users = [HttpUser(url) for _ in range(args.concurrency)]
+            login(users)
+            run_scenario(users, 'search', args.requests)  # warm the caches
+            for name in ('auth', 'search'):
+                row = run_scenario(users, name, args.requests)
+                print(f"{workers:>7} {name:<8} {row['rps']:>9.1f} {row['p50_ms']:>6.2f} ms "
+                      f"{row['p95_ms']:>6.2f} ms {row['p99_ms']:>6.2f} ms {row['errors']:>5}")
+        finally:
+            server.terminate()
+            server.wait()
+
+    fake.stop()
+    shutil.rmtree(tmp)
+
+if __name__ == '__main__':
+    main()
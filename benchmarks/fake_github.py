@@ -0,0 +1,185 @@
+"""Local stand-in for the GitHub endpoints RepoRetriever calls
+
+Serves repository search, /user and the OAuth token exchange with
+replayable fixtures, a configurable latency, X-RateLimit-* headers and
+ETag revalidation. The same query always gets the same response: it comes
+from the fixtures file when one is given, and is otherwise generated from
+a generator seeded by the query.
+
+Used by load_test.py, or on its own:
+    python benchmarks/fake_github.py [port] [latency_ms]
+then start the app with GITHUB_API_URL and GITHUB_WEB_URL set to
+http://127.0.0.1:<port>.
+"""
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORDS = ("fast async web http client server parser json yaml cli terminal game engine graphics "
+         "render neural network training data pipeline stream queue cache store database orm "
+         "auth token crypto chart plot dashboard admin mobile android docker cloud").split()
+LANGUAGES = ["Python", "JavaScript", "Go", "Rust", "Java", "TypeScript", "C++", "Ruby"]
+
+
+def synthetic_repo(rng):
+    owner = f"{rng.choice(WORDS)}-{rng.randrange(1000)}"
+    name = f"{rng.choice(WORDS)}-{rng.choice(WORDS)}"
+    return {
+        "id": rng.randrange(1, 2**31),
+        "name": name,
+        "full_name": f"{owner}/{name}",
+        "owner": {"login": owner},
+        "html_url": f"https://github.com/{owner}/{name}",
+        "description": ' '.join(rng.choice(WORDS) for _ in range(10)),
+        "language": rng.choice(LANGUAGES),
+        "topics": rng.sample(WORDS, 3),
+        "stargazers_count": rng.randrange(100000),
+        "forks_count": rng.randrange(10000),
+        "open_issues_count": rng.randrange(500),
+        "size": rng.randrange(100000),
+        "pushed_at": f"20{rng.randrange(18, 25)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}T00:00:00Z",
+        # Part of the payload the app trims away, so responses weigh what GitHub's do
+        "license": {"key": "mit", "name": "MIT License", "spdx_id": "MIT"},
+        "permissions": {"admin": False, "push": False, "pull": True},
+        "url": f"https://api.github.com/repos/{owner}/{name}",
+        "default_branch": "main",
+        "watchers_count": rng.randrange(100000)
+    }
+
+
+class FakeGitHub:
+    """Threaded HTTP server answering like api.github.com and github.com/login/oauth"""
+
+    def __init__(self, latency=0.05, rate_limit=5000, window=3600, fixtures=None):
+        self.latency = latency          # seconds added to every response
+        self.rate_limit = rate_limit    # search calls allowed per window
+        self.window = window
+        self.fixtures = {}              # query -> items
+        if fixtures:
+            with open(fixtures, encoding='utf-8') as f:
+                self.fixtures = json.load(f)
+        self.calls = {"search": 0, "not_modified": 0, "rate_limited": 0, "user": 0, "token": 0}
+        self._remaining = rate_limit
+        self._reset_at = time.time() + window
+        self._lock = threading.Lock()
+        self._server = None
+
+    def search_items(self, query, per_page):
+        if query in self.fixtures:
+            return self.fixtures[query][:per_page]
+        rng = random.Random(query)
+        return [synthetic_repo(rng) for _ in range(per_page)]
+
+    def take_call(self):
+        """Spend one search call; returns (allowed, remaining, reset_at)"""
+        with self._lock:
+            now = time.time()
+            if now >= self._reset_at:
+                self._remaining = self.rate_limit
+                self._reset_at = now + self.window
+            allowed = self._remaining > 0
+            if allowed:
+                self._remaining -= 1
+            return allowed, self._remaining, int(self._reset_at)
+
+    def count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def start(self, port=0):
+        """Serve on a daemon thread; returns the base URL"""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def send_json(self, status, payload, headers=()):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                time.sleep(fake.latency)
+                url = urlparse(self.path)
+                if url.path == '/search/repositories':
+                    self.search(parse_qs(url.query))
+                elif url.path == '/user':
+                    fake.count('user')
+                    token = self.headers.get('Authorization', '').rsplit(' ', 1)[-1]
+                    login = token.removeprefix('tok-') or 'octocat'
+                    user_id = int(hashlib.sha1(login.encode()).hexdigest()[:8], 16)
+                    self.send_json(200, {"id": user_id, "login": login})
+                else:
+                    self.send_json(404, {"message": "Not Found"})
+
+            def do_POST(self):
+                time.sleep(fake.latency)
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode()
+                if urlparse(self.path).path == '/login/oauth/access_token':
+                    fake.count('token')
+                    code = parse_qs(body).get('code', [''])[0]
+                    self.send_json(200, {"access_token": f"tok-{code}", "token_type": "bearer"})
+                else:
+                    self.send_json(404, {"message": "Not Found"})
+
+            def search(self, params):
+                query = params.get('q', [''])[0]
+                per_page = int(params.get('per_page', ['30'])[0])
+                items = fake.search_items(query, per_page)
+                etag = '"' + hashlib.sha1(json.dumps(items).encode()).hexdigest() + '"'
+
+                # GitHub does not charge conditional requests answered with 304
+                if self.headers.get('If-None-Match') == etag:
+                    fake.count('not_modified')
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                allowed, remaining, reset_at = fake.take_call()
+                limit_headers = [('X-RateLimit-Limit', str(fake.rate_limit)),
+                                 ('X-RateLimit-Remaining', str(remaining)),
+                                 ('X-RateLimit-Reset', str(reset_at))]
+                if not allowed:
+                    fake.count('rate_limited')
+                    self.send_json(403, {"message": "API rate limit exceeded"}, limit_headers)
+                    return
+                fake.count('search')
+                self.send_json(200, {"total_count": len(items), "incomplete_results": False, "items": items},
+                               limit_headers + [('ETag', etag)])
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 50
+    fake = FakeGitHub(latency=latency_ms / 1000)
+    print(f"Fake GitHub listening on {fake.start(port)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,251 @@
+"""Load test of the main endpoints against a local GitHub stand-in
+
+Drives /auth/user, /search, /repos/save and /repos/saved at a fixed
+concurrency, first through the Flask test client (app code only, in this
+process) and then over HTTP against a real threaded WSGI server running in
+its own process, so the client does not compete with it for the GIL.
+Reports throughput,
+p50/p95/p99 and memory, and compares each result with
+benchmarks/baseline.json: a drop in throughput or a rise in p95 beyond
+--tolerance is flagged and makes the exit status 1.
+
+Run from the project root:
+    python benchmarks/load_test.py [--requests N] [--concurrency C] [--latency MS]
+                                   [--tolerance 0.3] [--save-baseline]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+from fake_github import FakeGitHub, synthetic_repo
+
+QUERIES = [
+    "Python machine learning for beginners", "React components for building dashboards",
+    "JavaScript game engine for 2D games", "Docker configuration for Node.js",
+    "Popular web scraping tools", "Lightweight JSON parser", "Active authentication library",
+    "rust command line tools", "go http router", "typescript orm", "java spring boot starter",
+    "vue admin template", "python data visualization", "kotlin android library",
+    "c++ graphics engine", "ruby on rails gems", "swift ios ui components", "php laravel packages",
+    "deep learning framework", "static site generator", "markdown editor", "terminal emulator",
+    "database migration tool", "kubernetes operator", "chat application", "password manager"
+]
+
+
+class TestClientUser:
+    """One virtual user driving the app in-process through Flask's test client"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, json_body=None):
+        return self.client.open(path, method=method, json=json_body).status_code
+
+
+class HttpUser:
+    """One virtual user talking to the app over HTTP with its own keep-alive session"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.http = requests.Session()
+
+    def request(self, method, path, json_body=None):
+        return self.http.request(method, self.base_url + path, json=json_body, allow_redirects=False).status_code
+
+
+def scenario_requests(name, worker, i):
+    """(method, path, body) of request i from worker in scenario name"""
+    if name == 'auth':
+        return 'GET', '/auth/user', None
+    if name == 'search':
+        return 'POST', '/search', {"query": QUERIES[(worker * 7 + i) % len(QUERIES)]}
+    if name == 'save':
+        repo = synthetic_repo(random.Random(f"{worker}-{i}"))
+        repo['id'] = worker * 1_000_000 + i  # unique per request, so no 409s
+        return 'POST', '/repos/save', {"repo": repo}
+    if name == 'saved':
+        return 'GET', '/repos/saved', None
+    raise ValueError(name)
+
+
+def percentile(samples, pct):
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def rss_mb(pid='self'):
+    """Current resident set size of a process, from /proc where available"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return None
+
+
+def run_scenario(users, name, total, server_pid=None):
+    """Spread total requests over the users' threads; returns the result row"""
+    per_user = max(1, total // len(users))
+    latencies = [[] for _ in users]
+    errors = [0] * len(users)
+    start_gate = threading.Barrier(len(users) + 1)
+
+    def work(worker, user):
+        start_gate.wait()
+        for i in range(per_user):
+            method, path, body = scenario_requests(name, worker, i)
+            started = time.perf_counter()
+            status = user.request(method, path, body)
+            latencies[worker].append((time.perf_counter() - started) * 1000)
+            if status >= 400:
+                errors[worker] += 1
+
+    threads = [threading.Thread(target=work, args=(worker, user)) for worker, user in enumerate(users)]
+    for thread in threads:
+        thread.start()
+    start_gate.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    samples = sorted(sample for worker_samples in latencies for sample in worker_samples)
+    return {
+        "requests": len(samples),
+        "errors": sum(errors),
+        "rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(percentile(samples, 50), 2),
+        "p95_ms": round(percentile(samples, 95), 2),
+        "p99_ms": round(percentile(samples, 99), 2),
+        "rss_mb": round(rss_mb(server_pid or 'self') or 0, 1)
+    }
+
+
+def serve(port_queue):
+    """Child process: import the app fresh and serve it with werkzeug's threaded server"""
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, create_app(), threaded=True)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def login(users):
+    """Log every virtual user in through the OAuth callback (the stand-in accepts any code)"""
+    for n, user in enumerate(users):
+        status = user.request('GET', f'/auth/callback?code=loadtest{n}')
+        if status != 302:
+            raise RuntimeError(f"login failed with status {status}")
+
+
+def compare(results, baseline, tolerance):
+    """Print each result next to its baseline; returns the keys that regressed"""
+    regressions = []
+    print(f"\n{'target/scenario':<22} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'err':>5} {'rss':>8}  vs baseline")
+    for key, row in results.items():
+        base = baseline.get(key)
+        note = ''
+        if base:
+            rps_change = row['rps'] / base['rps'] - 1
+            p95_change = row['p95_ms'] / base['p95_ms'] - 1 if base['p95_ms'] else 0
+            note = f"req/s {rps_change:+.0%}, p95 {p95_change:+.0%}"
+            if rps_change < -tolerance or p95_change > tolerance:
+                regressions.append(key)
+                note += '  REGRESSION'
+        print(f"{key:<22} {row['rps']:>9.1f} {row['p50_ms']:>6.2f} ms {row['p95_ms']:>6.2f} ms "
+              f"{row['p99_ms']:>6.2f} ms {row['errors']:>5} {row['rss_mb']:>5.0f} MB  {note}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000, help="requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=8, help="virtual users (threads)")
+    parser.add_argument('--latency', type=float, default=50, help="stand-in GitHub latency in ms")
+    parser.add_argument('--tolerance', type=float, default=0.3, help="allowed relative slowdown")
+    parser.add_argument('--fixtures', help="JSON file mapping GitHub queries to result items")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    args = parser.parse_args()
+
+    fake = FakeGitHub(latency=args.latency / 1000, fixtures=args.fixtures)
+    base_url = fake.start()
+
+    # The app reads its configuration at import time
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        'DATABASE_PATH': os.path.join(tmp, 'loadtest.db'),
+        'GITHUB_API_URL': base_url,
+        'GITHUB_WEB_URL': base_url,
+        'PREFETCH_ENABLED': '0',
+        'LOG_LEVEL': 'WARNING',
+        'SECRET_KEY': 'loadtest'
+    })
+    import app as app_module
+    app = app_module.create_app()
+
+    config = {"requests": args.requests, "concurrency": args.concurrency, "latency_ms": args.latency}
+    results = {}
+    scenarios = ('auth', 'search', 'save', 'saved')
+
+    users = [TestClientUser(app) for _ in range(args.concurrency)]
+    login(users)
+    for name in scenarios:
+        results[f"test_client/{name}"] = run_scenario(users, name, args.requests)
+
+    # Same scenarios through a real server in a fresh process (it inherits the
+    # environment above, so it shares the database and the GitHub stand-in)
+    spawn = multiprocessing.get_context('spawn')
+    port_queue = spawn.Queue()
+    server = spawn.Process(target=serve, args=(port_queue,), daemon=True)
+    server.start()
+    base = f"http://127.0.0.1:{port_queue.get(timeout=30)}"
+    users = [HttpUser(base) for _ in range(args.concurrency)]
+    login(users)
+    for name in scenarios:
+        results[f"wsgi/{name}"] = run_scenario(users, name, args.requests, server.pid)
+    server.terminate()
+    server.join()
+
+    print(f"config: {config}")
+    print(f"upstream calls: {fake.calls}")
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            stored = json.load(f)
+        if stored.get('config') == config:
+            baseline = stored['results']
+        else:
+            print(f"baseline was recorded with {stored.get('config')}; not comparing")
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+            f.write('\n')
+        print(f"\nbaseline saved to {BASELINE_PATH}")
+
+    fake.stop()
+    app_module.db.pool.close_all()
+    shutil.rmtree(tmp)
+    if regressions and not args.save_baseline:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import db
+
+log = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache with an optional tier in the app database.
+
+    Entries can carry HTTP validators (ETag / Last-Modified) so an expired
+    entry can be revalidated upstream instead of downloaded again. With
+    persist set, entries are also written through db.connection() to a table
+    a db.py migration created.
+    """
+
+    def __init__(self, ttl=300, max_size=256, persist=False, table='search_cache', stale_ttl=3600):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl  # how long expired entries stay available as a fallback
+        self.max_size = max_size
+        self.persist = persist
+        self.table = table
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.revalidated = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value, validators)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        value, expires_at, validators = self._load(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, value, expires_at, validators)
+            return value
+
+    def get_stale(self, key):
+        """Return the value for key even if expired, as long as it is within stale_ttl"""
+        cutoff = time.time() - self.stale_ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > cutoff:
+                self.stale_hits += 1
+                return entry[1]
+
+        value, _, _ = self._load(key, cutoff)
+        if value is not None:
+            with self._lock:
+                self.stale_hits += 1
+        return value
+
+    def ttl_remaining(self, key):
+        """Seconds until the entry for key expires (negative if expired), or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry:
+            return entry[0] - time.time()
+        if not self.persist:
+            return None
+        # Another process may have refreshed it in the persistent tier
+        try:
+            with db.connection() as conn:
+                row = conn.execute(f'SELECT expires_at FROM {self.table} WHERE cache_key = ?', (key,)).fetchone()
+        except sqlite3.Error as e:
+            log.error("Cache read error: %s", e)
+            return None
+        return row[0] - time.time() if row else None
+
+    def peek(self, key):
+        """Return (value, validators) for key even if expired, without counting a hit"""
+        cutoff = time.time() - self.stale_ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > cutoff:
+                return entry[1], entry[2]
+
+        value, _, validators = self._load(key, cutoff)
+        return value, validators
+
+    def set(self, key, value, validators=None):
+        """Cache value under key for the configured TTL"""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at, validators)
+        self._save(key, value, expires_at, validators)
+
+    def revalidate(self, key, value, validators=None):
+        """Start a fresh TTL for an entry upstream confirmed unchanged (HTTP 304)"""
+        with self._lock:
+            self.revalidated += 1
+        self.set(key, value, validators)
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+        if self.persist:
+            with db.connection() as conn:
+                conn.execute(f'DELETE FROM {self.table}')
+
+    def stats(self):
+        """Hit/miss counters for health reporting"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "revalidated": self.revalidated,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "persistent": self.persist
+            }
+
+    def _store(self, key, value, expires_at, validators=None):
+        """Insert into the in-memory tier, evicting the least recently used entry"""
+        self._entries[key] = (expires_at, value, validators)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _load(self, key, now):
+        """Read an entry expiring after now from the persistent tier"""
+        if not self.persist:
+            return None, None, None
+        try:
+            with db.connection() as conn:
+                row = conn.execute(f'''SELECT payload, expires_at, validators FROM {self.table}
+                                      WHERE cache_key = ?''', (key,)).fetchone()
+        except sqlite3.Error as e:
+            log.error("Cache read error: %s", e)
+            return None, None, None
+        if not row or row[1] <= now:
+            return None, None, None
+        return json.loads(row[0]), row[1], json.loads(row[2]) if row[2] else None
+
+    def _save(self, key, value, expires_at, validators=None):
+        """Write an entry through to the persistent tier"""
+        if not self.persist:
+            return
+        try:
+            with db.connection() as conn:
+                conn.execute(f'''INSERT OR REPLACE INTO {self.table} (cache_key, payload, expires_at, validators)
+                                 VALUES (?, ?, ?, ?)''',
+                             (key, json.dumps(value), expires_at,
+                              json.dumps(validators) if validators else None))
+                conn.execute(f'DELETE FROM {self.table} WHERE expires_at <= ?',
+                             (time.time() - self.stale_ttl,))
+        except sqlite3.Error as e:
+            log.error("Cache write error: %s", e)
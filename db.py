@@ -0,0 +1,461 @@
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# Database location and connection pool settings
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'reporetriever.db')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '8192'))
+
+# Repository fields the UI renders; the rest of GitHub's payload is dropped
+SLIM_REPO_FIELDS = (
+    'id', 'name', 'full_name', 'html_url', 'description', 'language',
+    'stargazers_count', 'forks_count', 'open_issues_count', 'topics', 'pushed_at'
+)
+
+# Repository fields stored as real columns on saved_repos
+SAVED_REPO_COLUMNS = [
+    ('github_repo_id', 'INTEGER'),
+    ('full_name', 'TEXT'),
+    ('name', 'TEXT'),
+    ('owner_login', 'TEXT'),
+    ('html_url', 'TEXT'),
+    ('description', 'TEXT'),
+    ('language', 'TEXT'),
+    ('stargazers_count', 'INTEGER'),
+    ('forks_count', 'INTEGER'),
+]
+
+
+def open_connection(path=DATABASE_PATH):
+    """Open a connection tuned for concurrent web traffic"""
+    conn = sqlite3.connect(
+        path,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,  # connections move between threads via the pool
+        cached_statements=256     # keeps prepared statements alive across requests
+    )
+    # WAL lets readers run alongside a writer; NORMAL is durable in WAL mode
+    # except for the last transactions before a power loss
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA cache_size=-{DB_CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections"""
+
+    def __init__(self, path=DATABASE_PATH, size=DB_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                return open_connection(self.path)
+        return self._idle.get(timeout=DB_BUSY_TIMEOUT_MS / 1000)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection; commits on success and rolls back on error"""
+        conn = self._acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close_all(self):
+        """Close idle connections (e.g. before forking worker processes)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+
+pool = ConnectionPool()
+
+
+def connection():
+    """Check out a connection from the shared pool"""
+    return pool.connection()
+
+
+def _migrate_saved_repo_columns(conn):
+    """Promote key repo fields out of the repo_data JSON into indexed columns"""
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(saved_repos)')}
+    for column, column_type in SAVED_REPO_COLUMNS:
+        if column not in existing:
+            conn.execute(f'ALTER TABLE saved_repos ADD COLUMN {column} {column_type}')
+
+    # Backfill from the stored GitHub payloads
+    conn.execute('''UPDATE saved_repos SET
+                        github_repo_id = json_extract(repo_data, '$.id'),
+                        full_name = json_extract(repo_data, '$.full_name'),
+                        name = json_extract(repo_data, '$.name'),
+                        owner_login = json_extract(repo_data, '$.owner.login'),
+                        html_url = json_extract(repo_data, '$.html_url'),
+                        description = json_extract(repo_data, '$.description'),
+                        language = json_extract(repo_data, '$.language'),
+                        stargazers_count = json_extract(repo_data, '$.stargazers_count'),
+                        forks_count = json_extract(repo_data, '$.forks_count')
+                    WHERE github_repo_id IS NULL AND json_valid(repo_data)''')
+
+    # Duplicate saves were possible before the unique index; keep the latest one,
+    # carrying over the notes written on the others
+    duplicates = conn.execute('''SELECT user_id, github_repo_id, MAX(id) FROM saved_repos
+                                 WHERE github_repo_id IS NOT NULL
+                                 GROUP BY user_id, github_repo_id
+                                 HAVING COUNT(*) > 1''').fetchall()
+    for user_id, github_repo_id, keep_id in duplicates:
+        notes = conn.execute('''SELECT user_note FROM saved_repos
+                                WHERE user_id = ? AND github_repo_id = ? ORDER BY id''',
+                             (user_id, github_repo_id)).fetchall()
+        merged = list(dict.fromkeys(note.strip() for (note,) in notes if note and note.strip()))
+        if merged:
+            conn.execute('UPDATE saved_repos SET user_note = ? WHERE id = ?', ('\n\n'.join(merged), keep_id))
+    deleted = conn.execute('''DELETE FROM saved_repos
+                              WHERE github_repo_id IS NOT NULL
+                                AND id NOT IN (SELECT MAX(id) FROM saved_repos
+                                               WHERE github_repo_id IS NOT NULL
+                                               GROUP BY user_id, github_repo_id)''').rowcount
+    if deleted:
+        log.warning("Removed %d duplicate saved repos; their notes were merged into the save kept", deleted)
+
+    conn.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_saved_repos_user_repo
+                    ON saved_repos (user_id, github_repo_id)''')
+
+
+def _migrate_slim_repo_data(conn):
+    """Rewrite stored GitHub payloads down to the slim repository record"""
+    # Rows that are not a JSON object (possible before saves were validated) are left as they are
+    rows = conn.execute('''SELECT id, repo_data FROM saved_repos
+                           WHERE CASE WHEN json_valid(repo_data) THEN json_type(repo_data) = 'object' END''').fetchall()
+    conn.executemany('UPDATE saved_repos SET repo_data = ? WHERE id = ?',
+                     ((json.dumps(slim_repo(json.loads(repo_data))), saved_id)
+                      for saved_id, repo_data in rows))
+
+
+def _migrate_saved_repo_keyset_index(conn):
+    """Index saved repos in page order so keyset pagination never sorts or skips"""
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_saved_repos_user_saved
+                    ON saved_repos (user_id, saved_at DESC, id DESC)''')
+
+
+# Space-separated topics from a saved_repos row's JSON, for the FTS index
+_FTS_TOPICS = '''CASE WHEN json_valid({row}.repo_data)
+                     THEN (SELECT group_concat(value, ' ') FROM json_each({row}.repo_data, '$.topics'))
+                END'''
+
+
+def _migrate_saved_repo_fts(conn):
+    """Full-text index over saved repos, kept in sync with saved_repos by triggers"""
+    # Matching "u<user_id>" in user_tag keeps other users' rows out of ranking
+    conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS saved_repos_fts USING fts5
+                    (name, description, topics, language, user_note, user_tag,
+                     tokenize = 'unicode61 remove_diacritics 2',
+                     prefix = '2 3 4')''')
+
+    insert_new = f'''INSERT INTO saved_repos_fts (rowid, name, description, topics, language, user_note, user_tag)
+                     VALUES (new.id, new.name, new.description, {_FTS_TOPICS.format(row='new')},
+                             new.language, new.user_note, 'u' || new.user_id);'''
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS saved_repos_fts_insert AFTER INSERT ON saved_repos
+                     BEGIN {insert_new} END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS saved_repos_fts_delete AFTER DELETE ON saved_repos
+                    BEGIN DELETE FROM saved_repos_fts WHERE rowid = old.id; END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS saved_repos_fts_update AFTER UPDATE ON saved_repos
+                     BEGIN
+                         DELETE FROM saved_repos_fts WHERE rowid = old.id;
+                         {insert_new}
+                     END''')
+
+    # Index rows saved before the table existed
+    conn.execute(f'''INSERT INTO saved_repos_fts (rowid, name, description, topics, language, user_note, user_tag)
+                     SELECT id, name, description, {_FTS_TOPICS.format(row='saved_repos')}, language, user_note,
+                            'u' || user_id
+                     FROM saved_repos''')
+
+
+def _migrate_repo_index(conn):
+    """Local index of repositories harvested from GitHub search results"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS repo_index
+                    (id INTEGER PRIMARY KEY,
+                     full_name TEXT,
+                     name TEXT,
+                     description TEXT,
+                     language TEXT,
+                     topics TEXT,
+                     stars INTEGER,
+                     forks INTEGER,
+                     size INTEGER,
+                     pushed_at TEXT,
+                     repo_data TEXT,
+                     indexed_at REAL)''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_repo_index_stars ON repo_index (stars DESC)')
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_repo_index_language_stars
+                    ON repo_index (language COLLATE NOCASE, stars DESC)''')
+
+    # External-content FTS table: the text lives in repo_index only
+    conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS repo_index_fts USING fts5
+                    (name, description, topics, language,
+                     content = 'repo_index', content_rowid = 'id',
+                     tokenize = 'unicode61 remove_diacritics 2')''')
+    insert_new = '''INSERT INTO repo_index_fts (rowid, name, description, topics, language)
+                    VALUES (new.id, new.name, new.description, new.topics, new.language);'''
+    delete_old = '''INSERT INTO repo_index_fts (repo_index_fts, rowid, name, description, topics, language)
+                    VALUES ('delete', old.id, old.name, old.description, old.topics, old.language);'''
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS repo_index_fts_insert AFTER INSERT ON repo_index BEGIN {insert_new} END')
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS repo_index_fts_delete AFTER DELETE ON repo_index BEGIN {delete_old} END')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS repo_index_fts_update AFTER UPDATE ON repo_index
+                     BEGIN {delete_old} {insert_new} END''')
+
+
+def _migrate_sessions(conn):
+    """Server-side session store, swept by expires_at"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS sessions
+                    (id TEXT PRIMARY KEY,
+                     data TEXT NOT NULL,
+                     expires_at REAL NOT NULL) WITHOUT ROWID''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)')
+
+
+def _migrate_prefetch_state(conn):
+    """Prefetch state every worker process shares: request counts and the random-repo pool"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS prefetch_counts
+                    (query TEXT NOT NULL,
+                     per_page INTEGER NOT NULL,
+                     sort TEXT NOT NULL,
+                     count REAL NOT NULL,
+                     PRIMARY KEY (query, per_page, sort)) WITHOUT ROWID''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS random_pool
+                    (seed TEXT PRIMARY KEY,
+                     fetched_at REAL NOT NULL,
+                     repositories TEXT NOT NULL)''')
+
+
+def _migrate_repo_index_age(conn):
+    """Index repo_index by harvest time so rows past REPO_INDEX_MAX_AGE are pruned without a scan"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_repo_index_indexed_at ON repo_index (indexed_at)')
+
+
+def _migrate_search_cache(conn):
+    """Persistent tier of the search cache (SEARCH_CACHE_PERSIST), shared by every worker"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS search_cache
+                    (cache_key TEXT PRIMARY KEY,
+                     payload TEXT,
+                     expires_at REAL,
+                     validators TEXT)''')
+    # Tables created by the cache itself before validators were stored
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(search_cache)')}
+    if 'validators' not in columns:
+        conn.execute('ALTER TABLE search_cache ADD COLUMN validators TEXT')
+
+
+# Schema migrations, applied in order; PRAGMA user_version records how many ran
+MIGRATIONS = [
+    _migrate_saved_repo_columns,
+    _migrate_slim_repo_data,
+    _migrate_saved_repo_keyset_index,
+    _migrate_saved_repo_fts,
+    _migrate_repo_index,
+    _migrate_sessions,
+    _migrate_prefetch_state,
+    _migrate_repo_index_age,
+    _migrate_search_cache,
+]
+
+
+def init_db():
+    """Initialize SQLite database and apply pending migrations"""
+    with connection() as conn:
+        c = conn.cursor()
+
+        # Users table
+        c.execute('''CREATE TABLE IF NOT EXISTS users
+                     (id INTEGER PRIMARY KEY,
+                      github_id INTEGER UNIQUE,
+                      username TEXT,
+                      access_token TEXT,
+                      created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+
+        # Saved repositories table
+        c.execute('''CREATE TABLE IF NOT EXISTS saved_repos
+                     (id INTEGER PRIMARY KEY,
+                      user_id INTEGER,
+                      repo_data TEXT,
+                      user_note TEXT,
+                      saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                      FOREIGN KEY (user_id) REFERENCES users(id))''')
+
+        version = c.execute('PRAGMA user_version').fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(conn)
+            c.execute(f'PRAGMA user_version = {number}')
+
+
+def owner_login(repo):
+    """The owner login of a repository payload, or None if owner is missing or not an object"""
+    owner = repo.get('owner')
+    return owner.get('login') if isinstance(owner, dict) else None
+
+
+def slim_repo(repo):
+    """Project a GitHub repository payload onto the fields the UI renders"""
+    slim = {field: repo.get(field) for field in SLIM_REPO_FIELDS}
+    slim['owner'] = {'login': owner_login(repo)}
+    return slim
+
+
+def saved_repo_fields(repo):
+    """Column values for a GitHub repository payload, in SAVED_REPO_COLUMNS order"""
+    return (
+        repo.get('id'),
+        repo.get('full_name'),
+        repo.get('name'),
+        owner_login(repo),
+        repo.get('html_url'),
+        repo.get('description'),
+        repo.get('language'),
+        repo.get('stargazers_count'),
+        repo.get('forks_count')
+    )
+
+
+def insert_saved_repo(conn, user_id, repo, note):
+    """Save a repository for a user; raises sqlite3.IntegrityError if already saved"""
+    columns = ', '.join(column for column, _ in SAVED_REPO_COLUMNS)
+    placeholders = ', '.join('?' * len(SAVED_REPO_COLUMNS))
+    cursor = conn.execute(f'''INSERT INTO saved_repos (user_id, repo_data, user_note, {columns})
+                              VALUES (?, ?, ?, {placeholders})''',
+                          (user_id, json.dumps(slim_repo(repo)), note, *saved_repo_fields(repo)))
+    return cursor.lastrowid
+
+
+def insert_saved_repos(conn, user_id, entries):
+    """Save many (repo, note, saved_at) entries with one executemany; returns how many were new"""
+    # Repos the user already saved are skipped by the (user_id, github_repo_id)
+    # unique index; a saved_at of None means now
+    columns = ', '.join(column for column, _ in SAVED_REPO_COLUMNS)
+    placeholders = ', '.join('?' * len(SAVED_REPO_COLUMNS))
+    cursor = conn.executemany(f'''INSERT OR IGNORE INTO saved_repos
+                                     (user_id, repo_data, user_note, saved_at, {columns})
+                                  VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), {placeholders})''',
+                              ((user_id, json.dumps(slim_repo(repo)), note, saved_at, *saved_repo_fields(repo))
+                               for repo, note, saved_at in entries))
+    # rowcount sums each row's changes and, unlike total_changes, leaves out the FTS triggers
+    return cursor.rowcount
+
+
+def iter_saved_repos(conn, user_id, batch_size):
+    """Every saved repo of a user, newest first, as lists of up to batch_size rows read off one cursor"""
+    # repo_data comes back as one line of JSON with an integer id, taken from github_repo_id if the
+    # JSON lacks one; legacy rows that are not a JSON object, or have no id anywhere, are left out
+    cursor = conn.execute('''SELECT id,
+                                     CASE WHEN json_type(repo_data, '$.id') = 'integer' THEN json(repo_data)
+                                          ELSE json_set(repo_data, '$.id', github_repo_id)
+                                     END,
+                                     user_note, saved_at
+                              FROM saved_repos
+                              WHERE user_id = ?
+                                AND CASE WHEN json_valid(repo_data) AND json_type(repo_data) = 'object'
+                                         THEN json_type(repo_data, '$.id') = 'integer'
+                                              OR typeof(github_repo_id) = 'integer'
+                                    END
+                              ORDER BY saved_at DESC, id DESC''', (user_id,))
+    while rows := cursor.fetchmany(batch_size):
+        yield rows
+
+
+def find_saved_ids(conn, user_id, repo_ids):
+    """Map GitHub repo id -> saved_repos id for the given ids, in one indexed query"""
+    repo_ids = list(repo_ids)
+    if not repo_ids:
+        return {}
+    placeholders = ','.join('?' * len(repo_ids))
+    rows = conn.execute(f'''SELECT github_repo_id, id FROM saved_repos
+                             WHERE user_id = ? AND github_repo_id IN ({placeholders})''',
+                        (user_id, *repo_ids)).fetchall()
+    return dict(rows)
+
+
+def list_saved_repos(conn, user_id, limit, after=None, q=None):
+    """One page of a user's saved repos, newest first, starting after a (saved_at, id) key"""
+    clauses = ['user_id = ?']
+    params = [user_id]
+
+    if after:
+        clauses.append('(saved_at, id) < (?, ?)')
+        params.extend(after)
+
+    if q:
+        # Same matching as search_saved_repos, kept in page order instead of ranked
+        query = saved_fts_match(user_id, q)
+        if not query:
+            return []
+        clauses.append('id IN (SELECT rowid FROM saved_repos_fts WHERE saved_repos_fts MATCH ?)')
+        params.append(query)
+
+    where = ' AND '.join(clauses)
+    return conn.execute(f'''SELECT id, repo_data, user_note, saved_at
+                             FROM saved_repos
+                             WHERE {where}
+                             ORDER BY saved_at DESC, id DESC
+                             LIMIT ?''',
+                        (*params, limit)).fetchall()
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, as a prefix"""
+    words = re.findall(r'\w+', text.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def saved_fts_match(user_id, text):
+    """FTS5 query for text over one user's saved repos; empty if text has no words"""
+    query = fts_query(text)
+    if not query:
+        return ''
+    # The user token keeps other users' rows out of the match
+    return f'user_tag : "u{int(user_id)}" AND {query}'
+
+
+def search_saved_repos(conn, user_id, text, limit, offset=0):
+    """A user's saved repos matching text, best bm25 match first"""
+    query = saved_fts_match(user_id, text)
+    if not query:
+        return []
+    # Rank inside the FTS table and only then join, so just one page of rows is read from saved_repos.
+    # Column weights: name, description, topics, language, user_note, user_tag
+    return conn.execute('''SELECT s.id, s.repo_data, s.user_note, s.saved_at
+                            FROM (SELECT rowid, bm25(saved_repos_fts, 10.0, 3.0, 5.0, 2.0, 4.0, 0.0) AS score
+                                  FROM saved_repos_fts
+                                  WHERE saved_repos_fts MATCH ?
+                                  ORDER BY score
+                                  LIMIT ? OFFSET ?) AS hits
+                            JOIN saved_repos s ON s.id = hits.rowid
+                            WHERE s.user_id = ?
+                            ORDER BY hits.score''',
+                        (query, limit, offset, user_id)).fetchall()
@@ -0,0 +1,259 @@
+"""Query-expansion model built offline from GitHub topics and repository descriptions
+
+Build it from the repositories the app has harvested into repo_index (and/or
+NDJSON files of repositories, such as /repos/export downloads):
+    python expansion.py [--db reporetriever.db] [--ndjson FILE ...] [--out query_expansion.bin]
+The app picks the file up from QUERY_EXPANSION_PATH on the first search.
+"""
+import argparse
+import array
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import sys
+import threading
+from collections import Counter
+
+log = logging.getLogger(__name__)
+
+# Where the app looks for the model; empty disables it
+QUERY_EXPANSION_PATH = os.getenv('QUERY_EXPANSION_PATH', 'query_expansion.bin')
+
+# Build settings
+MIN_DF = 3              # terms in fewer repositories are dropped as noise
+MAX_DF_RATIO = 0.3      # terms in more than this share of repositories are too generic to help
+MAX_TERMS_PER_DOC = 32  # bounds the pairs counted per repository
+NEIGHBORS = 16          # associated terms kept per term
+MIN_ASSOCIATION = 0.1   # normalized PMI below this is not kept
+
+# Scoring: how much co-occurrence with the rest of the query counts against a term's own weight
+ASSOCIATION_WEIGHT = 2.0
+
+MAGIC = b'RQE1'
+HEADER = struct.Struct('<4sIII')  # magic, terms, neighbor entries, bytes of term text
+WORD_RE = re.compile(r'\b\w+\b')  # split the way the app splits queries
+
+
+def doc_terms(topics, text):
+    """Distinct terms of one repository (topics first, then name/description words) and its topics"""
+    topics = [topic.lower() for topic in topics if topic]
+    terms = dict.fromkeys(topics)
+    for word in WORD_RE.findall((text or '').lower()):
+        if len(word) > 2 and not word.isdigit():
+            terms.setdefault(word)
+    return list(terms)[:MAX_TERMS_PER_DOC], topics
+
+
+def build(documents):
+    """Count (topics, text) documents into the model arrays; returns (terms, weights, offsets, ids, scores)"""
+    docs = []
+    df = Counter()
+    topic_df = Counter()
+    for topics, text in documents:
+        terms, topics = doc_terms(topics, text)
+        docs.append(terms)
+        df.update(terms)
+        topic_df.update(set(topics))
+
+    n_docs = len(docs)
+    vocab = sorted(term for term, count in df.items()
+                   if count >= MIN_DF and count <= MAX_DF_RATIO * n_docs and '\n' not in term)
+    term_id = {term: i for i, term in enumerate(vocab)}
+    log.info("%d repositories, %d terms kept of %d", n_docs, len(vocab), len(df))
+
+    # A term's own weight: how specific it is (idf) times how often GitHub
+    # uses it as a topic rather than as a passing word in a description
+    weights = array.array('f', (
+        math.log(n_docs / df[term]) * (topic_df[term] + 1) / (df[term] + 2) for term in vocab
+    ))
+
+    # Co-occurrence within a repository, over vocabulary terms only
+    size = len(vocab)
+    pairs = Counter()
+    for terms in docs:
+        ids = sorted(term_id[term] for term in terms if term in term_id)
+        for i, a in enumerate(ids):
+            for b in ids[i + 1:]:
+                pairs[a * size + b] += 1
+
+    # Normalized PMI, so association does not just track frequency
+    neighbors = [[] for _ in vocab]
+    for key, count in pairs.items():
+        if count < 2:
+            continue
+        a, b = divmod(key, size)
+        p_ab = count / n_docs
+        npmi = math.log(p_ab / (df[vocab[a]] / n_docs * df[vocab[b]] / n_docs)) / -math.log(p_ab)
+        if npmi >= MIN_ASSOCIATION:
+            neighbors[a].append((npmi, b))
+            neighbors[b].append((npmi, a))
+
+    offsets = array.array('I', [0])
+    ids = array.array('I')
+    scores = array.array('f')
+    for entries in neighbors:
+        entries.sort(reverse=True)
+        for npmi, other in sorted(entries[:NEIGHBORS], key=lambda entry: entry[1]):
+            ids.append(other)
+            scores.append(npmi)
+        offsets.append(len(ids))
+    return vocab, weights, offsets, ids, scores
+
+
+def write(path, vocab, weights, offsets, ids, scores):
+    """Store the arrays little-endian, each 4-byte aligned, so they can be mapped without copying"""
+    text = '\n'.join(vocab).encode('utf-8')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(vocab), len(ids), len(text)))
+        for values in (weights, offsets, ids, scores):
+            if sys.byteorder == 'big':
+                values = array.array(values.typecode, values)
+                values.byteswap()
+            f.write(values.tobytes())
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class ExpansionModel:
+    """Read-only view of a model file: term weights and each term's strongest associations"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_terms, n_neighbors, text_size = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a query expansion model")
+        if len(self._map) != HEADER.size + 4 * (2 * n_terms + 1 + 2 * n_neighbors) + text_size:
+            raise ValueError(f"{path} is truncated or corrupt")
+
+        view = memoryview(self._map)
+        start = HEADER.size
+        arrays = []
+        for typecode, count in (('f', n_terms), ('I', n_terms + 1), ('I', n_neighbors), ('f', n_neighbors)):
+            end = start + 4 * count
+            values = view[start:end].cast(typecode)
+            if sys.byteorder == 'big':
+                values = array.array(typecode, values)
+                values.byteswap()
+            arrays.append(values)
+            start = end
+        self.weights, self.offsets, self.ids, self.scores = arrays
+        self.terms = bytes(view[start:start + text_size]).decode('utf-8').split('\n') if text_size else []
+        self.term_id = {term: i for i, term in enumerate(self.terms)}
+        self.path = path
+
+    def neighbors(self, term_index):
+        """{neighbor index: normalized PMI} of one term"""
+        start, end = self.offsets[term_index], self.offsets[term_index + 1]
+        return dict(zip(self.ids[start:end], self.scores[start:end]))
+
+    def rank(self, candidates, context):
+        """candidates ordered best first as search keywords for a query made of context terms"""
+        context_ids = [self.term_id[term] for term in context if term in self.term_id]
+        associations = [self.neighbors(i) for i in context_ids]
+
+        def score(position, candidate):
+            i = self.term_id.get(candidate)
+            if i is None:
+                # Never seen in the corpus: keep it, behind every term with evidence
+                return (0, 0.0, -position)
+            linked = sum(links.get(i, 0.0) for j, links in zip(context_ids, associations) if j != i)
+            return (1, self.weights[i] + ASSOCIATION_WEIGHT * linked, -position)
+
+        scored = sorted(((score(position, candidate), candidate) for position, candidate in enumerate(candidates)),
+                        reverse=True)
+        return [candidate for _, candidate in scored]
+
+    def expand(self, context, exclude=(), limit=6):
+        """Terms the corpus associates with the context, strongest first, none of them in exclude"""
+        totals = Counter()
+        for term in context:
+            i = self.term_id.get(term)
+            if i is not None:
+                for other, npmi in self.neighbors(i).items():
+                    totals[other] += npmi * self.weights[other]
+        exclude = set(exclude) | set(context)
+        expansions = (self.terms[i] for i, _ in totals.most_common())
+        return [term for term in expansions if term not in exclude][:limit]
+
+    def stats(self):
+        return {"path": self.path, "terms": len(self.terms), "neighbors": len(self.ids)}
+
+
+_model = None
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def get_model(path=QUERY_EXPANSION_PATH):
+    """The model at path, loaded on first use; None if there is no usable file"""
+    global _model, _loaded
+    if not _loaded:
+        with _load_lock:
+            if not _loaded:
+                if path and os.path.exists(path):
+                    try:
+                        _model = ExpansionModel(path)
+                        log.info("Query expansion model loaded: %d terms", len(_model.terms))
+                    except (OSError, ValueError, struct.error) as e:
+                        log.warning("Query expansion model %s not loaded: %s", path, e)
+                _loaded = True
+    return _model
+
+
+def stats():
+    """Model details for health reporting (None until loaded or when absent)"""
+    return _model.stats() if _model else None
+
+
+def iter_db_documents(path):
+    """(topics, text) of every repository harvested into repo_index"""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        for name, description, topics in conn.execute('SELECT name, description, topics FROM repo_index'):
+            yield (topics or '').split(), f"{name or ''} {description or ''}"
+    finally:
+        conn.close()
+
+
+def iter_ndjson_documents(path):
+    """(topics, text) of every repository in an NDJSON file (export lines or bare GitHub payloads)"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                repo = record.get('repo', record)
+                yield repo.get('topics') or [], f"{repo.get('name') or ''} {repo.get('description') or ''}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help="database whose repo_index to read (default: DATABASE_PATH)")
+    parser.add_argument('--ndjson', nargs='*', default=[], help="NDJSON files of repositories")
+    parser.add_argument('--out', default=QUERY_EXPANSION_PATH or 'query_expansion.bin')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    sources = []
+    if args.db or not args.ndjson:
+        sources.append(iter_db_documents(args.db or os.getenv('DATABASE_PATH', 'reporetriever.db')))
+    sources += [iter_ndjson_documents(path) for path in args.ndjson]
+
+    documents = (document for source in sources for document in source)
+    model = build(documents)
+    if not model[0]:
+        log.error("No terms left after filtering; harvest more repositories first")
+        return 1
+    write(args.out, *model)
+    log.info("Wrote %s (%d bytes)", args.out, os.path.getsize(args.out))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pool and timeout settings for calls to GitHub
+GITHUB_POOL_SIZE = int(os.getenv('GITHUB_POOL_SIZE', '20'))
+GITHUB_CONNECT_TIMEOUT = float(os.getenv('GITHUB_CONNECT_TIMEOUT', '3.05'))
+GITHUB_READ_TIMEOUT = float(os.getenv('GITHUB_READ_TIMEOUT', '10'))
+GITHUB_MAX_RETRIES = int(os.getenv('GITHUB_MAX_RETRIES', '3'))
+GITHUB_RETRY_BACKOFF = float(os.getenv('GITHUB_RETRY_BACKOFF', '0.5'))
+GITHUB_MAX_RETRY_AFTER = float(os.getenv('GITHUB_MAX_RETRY_AFTER', '10'))
+
+# Below this many remaining calls, stale cached results are preferred
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv('GITHUB_RATE_LIMIT_RESERVE', '5'))
+
+
+class GitHubRetry(Retry):
+    """Retry 5xx errors with backoff, and rate-limit responses only when GitHub says when"""
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        # A 403 without Retry-After is a primary rate limit or a permission
+        # error; neither gets better by retrying before the reset window.
+        if status_code in (403, 429) and not has_retry_after:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is not None:
+            # Never pin a worker for longer than the configured cap
+            retry_after = min(retry_after, GITHUB_MAX_RETRY_AFTER)
+        return retry_after
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies default connect/read timeouts to every request"""
+
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_session(pool_size=GITHUB_POOL_SIZE,
+                   timeout=(GITHUB_CONNECT_TIMEOUT, GITHUB_READ_TIMEOUT),
+                   max_retries=GITHUB_MAX_RETRIES):
+    """Build a keep-alive session with a bounded connection pool, timeouts and retries"""
+    retry = GitHubRetry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=GITHUB_RETRY_BACKOFF,
+        status_forcelist=(403, 429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+        timeout=timeout
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    # The session is shared by every user's request, so never keep cookies
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+# Shared session for all GitHub calls. Only per-call arguments are passed in
+# requests; the session itself is never mutated after creation, which keeps
+# it safe to share between worker threads.
+http = create_session()
+
+
+def conditional_headers(validators):
+    """If-None-Match / If-Modified-Since headers for a cached response's validators"""
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+
+def response_validators(response):
+    """ETag / Last-Modified of a response, or None if it sent neither"""
+    validators = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified')
+    }
+    return validators if any(validators.values()) else None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one in-flight call"""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn for key, or wait for and share the result of the call already running"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class RateLimitTracker:
+    """Track GitHub's X-RateLimit-* headers to know when the budget is running low"""
+
+    def __init__(self, reserve=GITHUB_RATE_LIMIT_RESERVE):
+        self.reserve = reserve
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self._lock = threading.Lock()
+
+    def update(self, headers):
+        """Record the budget reported by a GitHub response"""
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        with self._lock:
+            self.remaining = int(remaining)
+            self.limit = int(headers.get('X-RateLimit-Limit', self.limit or 0))
+            self.reset_at = int(headers.get('X-RateLimit-Reset', 0)) or None
+
+    def is_low(self):
+        """True while the remaining budget is at or below the reserve and not yet reset"""
+        with self._lock:
+            if self.remaining is None or self.remaining > self.reserve:
+                return False
+            return self.reset_at is None or time.time() < self.reset_at
+
+    def available(self):
+        """Calls left above the reserve, or None if unknown or the window has reset"""
+        with self._lock:
+            if self.remaining is None or (self.reset_at and time.time() >= self.reset_at):
+                return None
+            return max(self.remaining - self.reserve, 0)
+
+    def snapshot(self):
+        """Current budget for health reporting"""
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "reset_at": self.reset_at,
+                "reserve": self.reserve
+            }
@@ -0,0 +1,50 @@
+"""gunicorn settings for production: gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden on the command line (e.g. -w 4) or through
+the environment variables below.
+"""
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+chdir = os.path.dirname(os.path.abspath(__file__))  # index.html and favicon.png are served relative to it
+
+# SQLite allows one writer at a time and most request time is spent waiting
+# on GitHub, so a few processes with several threads each beat many
+# single-threaded ones; threads also keep /search/stream from pinning a worker
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 20
+keepalive = 5
+
+# Workers share searches through the SQLite cache tier: the worker leading
+# prefetch refreshes hot searches for all of them, and a search one worker
+# fetched is a hit in the others
+os.environ.setdefault('SEARCH_CACHE_PERSIST', '1')
+
+# Recycle workers now and then so slow leaks cannot accumulate
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '5000'))
+max_requests_jitter = max_requests // 10
+
+# The app keeps per-process state (SQLite and HTTP connection pools, caches,
+# executor and prefetch threads). Importing it in the master and forking
+# would share sockets and lose threads, so each worker imports it itself.
+preload_app = False
+
+
+def on_starting(server):
+    """Apply migrations once, before any worker starts"""
+    import db
+    db.init_db()
+    db.pool.close_all()  # no connection may outlive the fork
+    os.environ['DB_INIT_ON_START'] = '0'
+
+    if not os.getenv('SECRET_KEY'):
+        server.log.warning("SECRET_KEY is not set: each worker signs cookies with its own random key")
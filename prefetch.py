@@ -0,0 +1,262 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process, so it always leads
+    fcntl = None
+
+import db
+
+log = logging.getLogger(__name__)
+
+# Scheduler settings
+PREFETCH_INTERVAL = float(os.getenv('PREFETCH_INTERVAL', '60'))
+PREFETCH_TOP_N = int(os.getenv('PREFETCH_TOP_N', '20'))
+PREFETCH_CONCURRENCY = int(os.getenv('PREFETCH_CONCURRENCY', '2'))
+PREFETCH_MAX_CALLS = int(os.getenv('PREFETCH_MAX_CALLS', '3'))  # upstream calls per cycle
+PREFETCH_RATE_RESERVE = int(os.getenv('PREFETCH_RATE_RESERVE', '10'))  # left for interactive traffic
+PREFETCH_REFRESH_MARGIN = float(os.getenv('PREFETCH_REFRESH_MARGIN', '90'))  # seconds before expiry
+RANDOM_POOL_TTL = float(os.getenv('RANDOM_POOL_TTL', '3600'))
+# Distinct searches counted between cycles; the least requested are dropped beyond this
+PREFETCH_MAX_TRACKED = int(os.getenv('PREFETCH_MAX_TRACKED', str(PREFETCH_TOP_N * 10)))
+
+# Searches the random-repo pool is drawn from
+RANDOM_SEED_QUERIES = [
+    'stars:>10000',
+    'stars:>5000 language:javascript',
+    'stars:>5000 language:python',
+    'stars:>5000 language:java',
+    'stars:>5000 language:go',
+    'stars:>1000 language:rust',
+    'stars:>1000 language:typescript',
+    'awesome',
+    'framework',
+    'library'
+]
+RANDOM_PER_PAGE = 100
+
+
+class PrefetchWorker:
+    """Background refresher for hot searches and the random-repo pool.
+
+    refresh(query, per_page, sort) fetches from GitHub and stores the result;
+    ttl_remaining(query, per_page, sort) reports how fresh the cached copy is.
+    With lock_path set, only the process holding an exclusive lock on that
+    file runs cycles, so several workers do not multiply upstream calls.
+    With shared set, request counts and the random-repo pool live in the app
+    database, so the leader refreshes every worker's hot searches and every
+    worker draws from the pool it filled.
+    """
+
+    def __init__(self, refresh, ttl_remaining, rate_limit, lock_path=None, shared=False):
+        self.refresh = refresh
+        self.ttl_remaining = ttl_remaining
+        self.rate_limit = rate_limit
+        self.lock_path = lock_path
+        self.shared = shared
+        self._synced_at = 0
+        self._lock_file = None
+        self.cycles = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.budget_skips = 0
+        self._counts = {}       # (query, per_page, sort) -> decayed request count
+        self._pool = {}         # seed query -> (fetched_at, repositories)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = ThreadPoolExecutor(max_workers=PREFETCH_CONCURRENCY, thread_name_prefix='prefetch')
+
+    def record(self, query, per_page, sort):
+        """Count one interactive request for a search"""
+        if self._thread is None:
+            return  # prefetch disabled: nothing would ever read or decay the counts
+        key = (query, per_page, sort)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+            if len(self._counts) > 2 * PREFETCH_MAX_TRACKED:
+                self._prune_counts()
+
+    def _prune_counts(self):
+        """Keep the PREFETCH_MAX_TRACKED most requested searches (newest first among ties)"""
+        ranked = sorted(reversed(self._counts.items()), key=lambda item: item[1], reverse=True)
+        self._counts = dict(ranked[:PREFETCH_MAX_TRACKED])
+
+    def start(self):
+        """Run cycles on a daemon thread until stop() is called"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='prefetch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def is_leader(self):
+        """Take or keep the cross-process prefetch lock; False while another process holds it"""
+        if self._lock_file is not None or not self.lock_path or fcntl is None:
+            return True
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Held until this process exits; another worker takes over after that
+        self._lock_file = lock_file
+        return True
+
+    def _run(self):
+        while not self._stop.wait(PREFETCH_INTERVAL):
+            if self.shared:
+                self.flush_counts()
+            if not self.is_leader():
+                continue
+            try:
+                self.run_cycle()
+            except Exception as e:
+                log.error("Prefetch cycle error: %s", e)
+
+    def budget(self):
+        """Upstream calls this cycle may make without eating into interactive headroom"""
+        available = self.rate_limit.available()
+        if available is None:
+            return PREFETCH_MAX_CALLS
+        return max(0, min(PREFETCH_MAX_CALLS, available - PREFETCH_RATE_RESERVE))
+
+    def run_cycle(self):
+        """Refresh hot searches close to expiry, then stale random-pool seeds, within budget"""
+        budget = self.budget()
+        jobs = []
+        hot = self.take_hot()
+        if self.shared:
+            self.sync_pool()
+
+        with self._lock:
+            stale_seeds = [seed for seed in RANDOM_SEED_QUERIES
+                           if time.time() - self._pool.get(seed, (0, None))[0] > RANDOM_POOL_TTL]
+
+        for key in hot:
+            remaining = self.ttl_remaining(*key)
+            if remaining is None or remaining < PREFETCH_REFRESH_MARGIN:
+                jobs.append((self._refresh_search, key))
+        for seed in stale_seeds:
+            jobs.append((self._refresh_seed, seed))
+
+        if len(jobs) > budget:
+            self.budget_skips += len(jobs) - budget
+            jobs = jobs[:budget]
+
+        for future in [self._executor.submit(job, arg) for job, arg in jobs]:
+            try:
+                future.result()
+                self.refreshed += 1
+            except Exception as e:
+                log.warning("Prefetch error: %s", e)
+                self.failed += 1
+        self.cycles += 1
+
+    def take_hot(self):
+        """The PREFETCH_TOP_N most requested searches; halves every count so popularity tracks recent traffic"""
+        if not self.shared:
+            with self._lock:
+                hot = sorted(self._counts, key=self._counts.get, reverse=True)[:PREFETCH_TOP_N]
+                self._counts = {key: count / 2 for key, count in self._counts.items() if count >= 1}
+            return hot
+
+        self.flush_counts()
+        with db.connection() as conn:
+            hot = [tuple(row) for row in conn.execute(
+                'SELECT query, per_page, sort FROM prefetch_counts ORDER BY count DESC LIMIT ?', (PREFETCH_TOP_N,))]
+            conn.execute('UPDATE prefetch_counts SET count = count / 2')
+            conn.execute('DELETE FROM prefetch_counts WHERE count < 0.5')
+        return hot
+
+    def flush_counts(self):
+        """Add this process's counts to the shared table and start counting afresh"""
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        if not counts:
+            return
+        try:
+            with db.connection() as conn:
+                conn.executemany('''INSERT INTO prefetch_counts (query, per_page, sort, count)
+                                    VALUES (?, ?, ?, ?)
+                                    ON CONFLICT (query, per_page, sort) DO UPDATE SET count = count + excluded.count''',
+                                 [(*key, count) for key, count in counts.items()])
+        except sqlite3.Error as e:
+            log.error("Prefetch count flush error: %s", e)
+
+    def _refresh_search(self, key):
+        self.refresh(*key)
+
+    def _refresh_seed(self, seed):
+        self.fill_pool(seed, self.refresh(seed, RANDOM_PER_PAGE, 'stars'))
+
+    def fill_pool(self, seed, repositories):
+        """Store the results of a seed search in the random-repo pool"""
+        fetched_at = time.time()
+        with self._lock:
+            self._pool[seed] = (fetched_at, repositories)
+        if not self.shared:
+            return
+        try:
+            with db.connection() as conn:
+                conn.execute('INSERT OR REPLACE INTO random_pool (seed, fetched_at, repositories) VALUES (?, ?, ?)',
+                             (seed, fetched_at, json.dumps([db.slim_repo(repo) for repo in repositories or []])))
+        except sqlite3.Error as e:
+            log.error("Random pool write error: %s", e)
+
+    def sync_pool(self):
+        """Load the seeds another process refreshed since this one last looked"""
+        with self._lock:
+            known = {seed: fetched_at for seed, (fetched_at, _) in self._pool.items()}
+            self._synced_at = time.time()
+        try:
+            with db.connection() as conn:
+                newer = [seed for seed, fetched_at in conn.execute('SELECT seed, fetched_at FROM random_pool')
+                         if fetched_at > known.get(seed, 0)]
+                rows = [conn.execute('SELECT fetched_at, repositories FROM random_pool WHERE seed = ?',
+                                     (seed,)).fetchone() for seed in newer]
+        except sqlite3.Error as e:
+            log.error("Random pool read error: %s", e)
+            return
+        with self._lock:
+            for seed, (fetched_at, repositories) in zip(newer, rows):
+                self._pool[seed] = (fetched_at, json.loads(repositories))
+
+    def random_repo(self):
+        """A random repository from the pre-warmed pool, or None while it is empty"""
+        if self.shared and time.time() - self._synced_at > PREFETCH_INTERVAL:
+            self.sync_pool()
+        with self._lock:
+            filled = [repos for _, repos in self._pool.values() if repos]
+        if not filled:
+            return None
+        # Pick a seed first, then a repo, so big seeds do not dominate
+        return random.choice(random.choice(filled))
+
+    def stats(self):
+        """Counters for health reporting"""
+        with self._lock:
+            pool_size = sum(len(repos) for _, repos in self._pool.values())
+            tracked = len(self._counts)
+        return {
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "budget_skips": self.budget_skips,
+            "tracked_queries": tracked,
+            "random_pool_size": pool_size,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "leader": self._lock_file is not None or not self.lock_path or fcntl is None,
+            "shared": self.shared
+        }
@@ -0,0 +1,194 @@
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+import db
+
+log = logging.getLogger(__name__)
+
+# GitHub's language qualifier values that differ from the language names it reports
+LANGUAGE_ALIASES = {
+    'cpp': 'c++',
+    'csharp': 'c#'
+}
+
+# Qualifiers the local index can apply as range filters, and their columns
+RANGE_COLUMNS = {
+    'stars': 'stars',
+    'forks': 'forks',
+    'size': 'size',
+    'pushed': 'pushed_at'
+}
+
+QUALIFIER_RE = re.compile(r'^(\w[\w-]*):(>=|<=|>|<)?(.+)$')
+DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def parse_github_query(query):
+    """Split a GitHub search query into keywords, a language and range filters.
+
+    Returns None if the query uses anything the local index cannot answer.
+    """
+    keywords = []
+    language = None
+    ranges = []
+    for term in query.split():
+        match = QUALIFIER_RE.match(term)
+        if not match:
+            keywords.append(term)
+            continue
+
+        name, op, value = match.groups()
+        if name == 'language' and not op:
+            language = LANGUAGE_ALIASES.get(value.lower(), value.lower())
+        elif name in RANGE_COLUMNS and op:
+            if name == 'pushed':
+                if not DATE_RE.match(value):
+                    return None
+                # pushed_at is an ISO timestamp; compare against the ends of the day
+                value = value + 'T23:59:59Z' if op in ('>', '<=') else value
+            elif value.isdigit():
+                value = int(value)
+            else:
+                return None
+            ranges.append((RANGE_COLUMNS[name], op, value))
+        else:
+            return None
+    return keywords, language, ranges
+
+
+def fts_match(keywords):
+    """All keywords must match; hyphenated keywords match as phrases, the last word as a prefix"""
+    phrases = []
+    for keyword in keywords:
+        words = re.findall(r'\w+', keyword.lower())
+        if words:
+            phrases.append('"' + ' '.join(words) + '"*')
+    return ' '.join(phrases)
+
+
+class RepoIndex:
+    """Searchable local copy of repositories seen in GitHub search results"""
+
+    def __init__(self, min_results=12, max_age=None):
+        # A local answer with fewer matches than this counts as a miss
+        self.min_results = min_results
+        # Rows harvested longer ago than this (seconds) are ignored and then pruned; None keeps them forever
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.harvested = 0
+        self.pruned = 0
+        self._lock = threading.Lock()
+
+    def harvest(self, repositories):
+        """Insert or refresh repositories from a GitHub search response"""
+        rows = []
+        now = time.time()
+        for repo in repositories:
+            rows.append((
+                repo['id'],
+                repo.get('full_name'),
+                repo.get('name'),
+                repo.get('description'),
+                repo.get('language'),
+                ' '.join(repo.get('topics') or []),
+                repo.get('stargazers_count') or 0,
+                repo.get('forks_count') or 0,
+                repo.get('size') or 0,
+                repo.get('pushed_at'),
+                json.dumps(db.slim_repo(repo)),
+                now
+            ))
+        try:
+            with db.connection() as conn:
+                conn.executemany('''INSERT INTO repo_index
+                                    (id, full_name, name, description, language, topics,
+                                     stars, forks, size, pushed_at, repo_data, indexed_at)
+                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                    ON CONFLICT(id) DO UPDATE SET
+                                        full_name = excluded.full_name,
+                                        name = excluded.name,
+                                        description = excluded.description,
+                                        language = excluded.language,
+                                        topics = excluded.topics,
+                                        stars = excluded.stars,
+                                        forks = excluded.forks,
+                                        size = excluded.size,
+                                        pushed_at = excluded.pushed_at,
+                                        repo_data = excluded.repo_data,
+                                        indexed_at = excluded.indexed_at''', rows)
+                pruned = 0
+                if self.max_age:
+                    pruned = conn.execute('DELETE FROM repo_index WHERE indexed_at < ?',
+                                          (now - self.max_age,)).rowcount
+        except sqlite3.Error as e:
+            log.error("Repo index write error: %s", e)
+            return
+        with self._lock:
+            self.harvested += len(rows)
+            self.pruned += pruned
+
+    def search(self, query, per_page=12, sort='stars'):
+        """Answer a GitHub search query locally, or return None on a miss"""
+        parsed = parse_github_query(query) if sort == 'stars' else None
+        rows = self._query(parsed, per_page) if parsed else []
+
+        with self._lock:
+            if len(rows) < min(self.min_results, per_page):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return [json.loads(row[0]) for row in rows]
+
+    def _query(self, parsed, limit):
+        keywords, language, ranges = parsed
+        clauses = []
+        params = []
+
+        match = fts_match(keywords)
+        if match:
+            source = 'repo_index_fts JOIN repo_index r ON r.id = repo_index_fts.rowid'
+            clauses.append('repo_index_fts MATCH ?')
+            params.append(match)
+        else:
+            source = 'repo_index r'
+
+        if language:
+            clauses.append('r.language = ? COLLATE NOCASE')
+            params.append(language)
+
+        for column, op, value in ranges:
+            clauses.append(f'r.{column} {op} ?')
+            params.append(value)
+
+        # Stale copies count as a miss, so GitHub answers and refreshes them
+        if self.max_age:
+            clauses.append('r.indexed_at >= ?')
+            params.append(time.time() - self.max_age)
+
+        where = ' AND '.join(clauses) or '1'
+        try:
+            with db.connection() as conn:
+                return conn.execute(f'''SELECT r.repo_data FROM {source}
+                                        WHERE {where}
+                                        ORDER BY r.stars DESC
+                                        LIMIT ?''', (*params, limit)).fetchall()
+        except sqlite3.Error as e:
+            log.error("Repo index read error: %s", e)
+            return []
+
+    def stats(self):
+        """Hit/miss counters for health reporting"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "harvested": self.harvested,
+                "pruned": self.pruned,
+                "min_results": self.min_results,
+                "max_age": self.max_age
+            }
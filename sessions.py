@@ -0,0 +1,144 @@
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.sessions import SecureCookieSession, SessionInterface, session_json_serializer
+
+import db
+
+log = logging.getLogger(__name__)
+
+# Where sessions live: sqlite (the app database), cookie (signed cookie) or filesystem (Flask-Session)
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'sqlite').lower()
+SESSION_SWEEP_INTERVAL = float(os.getenv('SESSION_SWEEP_INTERVAL', '600'))  # seconds between expiry sweeps
+# An unchanged session is only rewritten once its expiry would move by more than this
+SESSION_REFRESH_SLACK = float(os.getenv('SESSION_REFRESH_SLACK', '3600'))
+
+
+class SqliteSession(SecureCookieSession):
+    """Session dict that remembers its id and when its row expires"""
+
+    def __init__(self, initial=None, sid=None, expires_at=None):
+        super().__init__(initial)
+        self.sid = sid
+        self.expires_at = expires_at
+
+
+class SqliteSessionInterface(SessionInterface):
+    """Server-side sessions in the app database, keyed by a random id in the cookie"""
+
+    session_class = SqliteSession
+    serializer = session_json_serializer
+
+    def __init__(self, sweep_interval=SESSION_SWEEP_INTERVAL, refresh_slack=SESSION_REFRESH_SLACK):
+        self.sweep_interval = sweep_interval
+        self.refresh_slack = refresh_slack
+        self.writes = 0
+        self.swept = 0
+        self._next_sweep = 0
+        self._lock = threading.Lock()
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            try:
+                with db.connection() as conn:
+                    row = conn.execute('SELECT data, expires_at FROM sessions WHERE id = ? AND expires_at > ?',
+                                       (sid, time.time())).fetchone()
+            except sqlite3.Error as e:
+                log.error("Session read error: %s", e)
+                row = None
+            if row:
+                return self.session_class(self.serializer.loads(row[0]), sid=sid, expires_at=row[1])
+
+        # Unknown or expired ids are never reused, so a planted cookie cannot fix the session id
+        return self.session_class(sid=secrets.token_urlsafe(32))
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        # Cleared (logout): drop the row and the cookie. Never used: write nothing.
+        if not session:
+            if session.modified:
+                self.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+            return
+
+        expires = self.get_expiration_time(app, session)
+        expires_at = time.time() + app.permanent_session_lifetime.total_seconds()
+
+        # Read-only requests (auth checks, listing saved repos) cost one indexed
+        # SELECT; the row and cookie are only rewritten when the data changed or
+        # the sliding expiry has drifted by more than refresh_slack.
+        drifted = session.expires_at is None or expires_at - session.expires_at > self.refresh_slack
+        if not (session.modified or drifted):
+            return
+
+        try:
+            with db.connection() as conn:
+                conn.execute('INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)',
+                             (session.sid, self.serializer.dumps(dict(session)), expires_at))
+        except sqlite3.Error as e:
+            log.error("Session write error: %s", e)
+            return
+        with self._lock:
+            self.writes += 1
+
+        response.set_cookie(name, session.sid, expires=expires, httponly=httponly,
+                            domain=domain, path=path, secure=secure, samesite=samesite)
+        self.maybe_sweep()
+
+    def delete(self, sid):
+        try:
+            with db.connection() as conn:
+                conn.execute('DELETE FROM sessions WHERE id = ?', (sid,))
+        except sqlite3.Error as e:
+            log.error("Session delete error: %s", e)
+
+    def maybe_sweep(self):
+        """Delete expired sessions, at most once per sweep_interval"""
+        now = time.time()
+        with self._lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + self.sweep_interval
+        try:
+            with db.connection() as conn:
+                removed = conn.execute('DELETE FROM sessions WHERE expires_at <= ?', (now,)).rowcount
+        except sqlite3.Error as e:
+            log.error("Session sweep error: %s", e)
+            return
+        with self._lock:
+            self.swept += removed
+
+    def stats(self):
+        """Counters for health reporting"""
+        with self._lock:
+            return {"backend": "sqlite", "writes": self.writes, "swept": self.swept}
+
+
+def init_sessions(app, backend=SESSION_BACKEND):
+    """Install the configured session backend on app and return its interface"""
+    if backend == 'sqlite':
+        app.session_interface = SqliteSessionInterface()
+    elif backend == 'filesystem':
+        from flask_session import Session
+        app.config['SESSION_TYPE'] = 'filesystem'
+        app.config.setdefault('SESSION_FILE_DIR', './flask_session')
+        Session(app)
+    elif backend != 'cookie':
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+    # 'cookie' keeps Flask's built-in signed-cookie sessions
+    return app.session_interface
@@ -0,0 +1,177 @@
+import bisect
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import g, request
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Set at the start of each request (and left set, so streamed bodies keep it);
+# copied into worker threads with contextvars.copy_context()
+request_id = contextvars.ContextVar('request_id', default='-')
+
+# Client-supplied request ids are only trusted in this shape; anything else
+# (newlines, log-forging text, huge values) gets a fresh id
+REQUEST_ID_RE = re.compile(r'[A-Za-z0-9._-]{1,64}')
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp every log record with the id of the request that produced it"""
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+def configure_logging(level=LOG_LEVEL):
+    """Send leveled logs to stderr; records below level are dropped before formatting"""
+    handler = logging.StreamHandler()
+    handler.addFilter(RequestIdFilter())
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observe() is a bisect and three increments"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket, like histogram_quantile()"""
+        counts, _, total = self.snapshot()
+        if not total:
+            return None
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+_lock = threading.Lock()
+_stages = {}     # stage -> Histogram
+_requests = {}   # endpoint -> Histogram
+_responses = {}  # (endpoint, status) -> count
+
+
+def _histogram(table, key):
+    hist = table.get(key)
+    if hist is None:
+        with _lock:
+            hist = table.setdefault(key, Histogram())
+    return hist
+
+
+def observe(stage, seconds):
+    """Record how long one pipeline stage took"""
+    _histogram(_stages, stage).observe(seconds)
+
+
+@contextmanager
+def timer(stage):
+    """Time the enclosed block as one observation of stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def init_app(app):
+    """Assign request ids and record per-endpoint latency and status counts"""
+
+    @app.before_request
+    def start_request():
+        g.request_started = time.perf_counter()
+        client_id = request.headers.get('X-Request-ID', '')
+        request_id.set(client_id if REQUEST_ID_RE.fullmatch(client_id) else uuid.uuid4().hex[:16])
+
+    @app.after_request
+    def finish_request(response):
+        # Streamed responses are timed to their first byte
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        _histogram(_requests, endpoint).observe(time.perf_counter() - g.request_started)
+        key = (endpoint, response.status_code)
+        with _lock:
+            _responses[key] = _responses.get(key, 0) + 1
+        response.headers['X-Request-ID'] = request_id.get()
+        return response
+
+
+def _labels(labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}' if labels else ''
+
+
+def _histogram_lines(name, help_text, label, table):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    quantile_lines = [f'# HELP {name}_quantile Estimated {help_text.lower()} quantiles',
+                      f'# TYPE {name}_quantile gauge']
+    for key, hist in sorted(table.items()):
+        counts, total_sum, total = hist.snapshot()
+        cumulative = 0
+        for bound, count in zip((*hist.buckets, '+Inf'), counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels({label: key, "le": bound})} {cumulative}')
+        lines.append(f'{name}_sum{_labels({label: key})} {total_sum:.6f}')
+        lines.append(f'{name}_count{_labels({label: key})} {total}')
+        for q in QUANTILES:
+            value = hist.quantile(q)
+            if value is not None:
+                quantile_lines.append(f'{name}_quantile{_labels({label: key, "quantile": q})} {value:.6f}')
+    return lines + quantile_lines
+
+
+def render_metrics(metrics):
+    """Prometheus text exposition of the latency histograms plus the given metrics.
+
+    metrics is a list of (name, type, help, samples), samples being (labels, value) pairs.
+    """
+    lines = _histogram_lines('reporetriever_stage_seconds', 'Time spent in each search stage', 'stage', _stages)
+    lines += _histogram_lines('reporetriever_request_seconds', 'Request latency by endpoint', 'endpoint', _requests)
+
+    lines += ['# HELP reporetriever_responses_total Responses by endpoint and status',
+              '# TYPE reporetriever_responses_total counter']
+    with _lock:
+        responses = sorted(_responses.items())
+    for (endpoint, status), count in responses:
+        lines.append(f'reporetriever_responses_total{_labels({"endpoint": endpoint, "status": status})} {count}')
+
+    for name, kind, help_text, samples in metrics:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for labels, value in samples:
+            if value is not None:
+                lines.append(f'{name}{_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Settings read at import time: no background threads, no expansion model (keywords
+# are chosen the way they always were) and a scratch default database; tests that
+# touch the database get their own below
+os.environ['QUERY_EXPANSION_PATH'] = ''
+os.environ['PREFETCH_ENABLED'] = '0'
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'default.db')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import db  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Path of an empty database that db.connection() now points at"""
+    path = str(tmp_path / 'test.db')
+    monkeypatch.setattr(db, 'pool', db.ConnectionPool(path))
+    yield path
+    db.pool.close_all()
+
+
+@pytest.fixture
+def client(database):
+    """Test client of a freshly migrated app"""
+    import app as app_module
+    app_module.search_cache.clear()
+    return app_module.create_app().test_client()
+
+
+@pytest.fixture
+def sign_in(client):
+    """Sign the test client in as a user id"""
+    def sign_in(user_id):
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+    return sign_in
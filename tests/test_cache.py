@@ -0,0 +1,24 @@
+import db
+from cache import ResponseCache
+
+
+def test_persisted_entries_are_shared_through_the_pool(database):
+    writer = ResponseCache(persist=True)  # built before the table exists, like at import
+    reader = ResponseCache(persist=True)
+    db.init_db()
+
+    writer.set('q', {'items': [1]}, validators={'etag': 'W/"1"'})
+
+    assert reader.get('q') == {'items': [1]}
+    assert 0 < reader.ttl_remaining('q') <= writer.ttl
+    reader.clear()
+    assert ResponseCache(persist=True).get('q') is None
+
+
+def test_memory_only_cache_leaves_the_database_alone(database):
+    cache = ResponseCache()
+    cache.set('q', [1])
+
+    assert cache.get('q') == [1]
+    with db.connection() as conn:
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'search_cache'").fetchone() is None
@@ -0,0 +1,79 @@
+"""NDJSON import and export of saved repositories"""
+import json
+
+import db
+
+
+def ndjson(*records):
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def import_body(client, body):
+    return client.post('/repos/import', data=body, content_type='application/x-ndjson')
+
+
+def export_records(client):
+    response = client.get('/repos/export')
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_export_imports_back_unchanged(client, sign_in):
+    sign_in(1)
+    for repo_id, note in ((1, 'first'), (2, ''), (3, 'line\nbreak')):
+        client.post('/repos/save', json={"repo": {"id": repo_id, "name": f"repo{repo_id}"}, "note": note})
+    exported = export_records(client)
+
+    sign_in(2)
+    result = import_body(client, ndjson(*exported)).get_json()
+    assert (result['imported'], result['duplicates'], result['invalid']) == (3, 0, 0)
+    again = import_body(client, ndjson(*exported)).get_json()
+    assert (again['imported'], again['duplicates']) == (0, 3)
+
+    def by_repo(records):
+        # Saves in the same second export by saved_repos id, which the import renumbers
+        return sorted(({key: value for key, value in record.items() if key != 'id'} for record in records),
+                      key=lambda record: record['repo']['id'])
+    assert by_repo(export_records(client)) == by_repo(exported)
+
+
+def test_export_repairs_or_skips_legacy_rows(client, sign_in):
+    sign_in(1)
+    with db.connection() as conn:
+        conn.executemany('INSERT INTO saved_repos (user_id, repo_data, user_note, github_repo_id) VALUES (1, ?, ?, ?)', [
+            ('not json', 'skipped', None),
+            ('["x"]', 'skipped', None),
+            ('{"name": "no id"}', 'skipped', None),
+            ('{"name": "id in column"}', 'repaired', 7),
+        ])
+
+    exported = export_records(client)
+
+    assert [(record['repo'], record['note']) for record in exported] == [({"name": "id in column", "id": 7}, 'repaired')]
+    sign_in(2)
+    assert import_body(client, ndjson(*exported)).get_json()['imported'] == 1
+
+
+def test_unusable_repo_lines_are_invalid_not_fatal(client, sign_in):
+    sign_in(1)
+    body = ndjson(
+        {"repo": {"id": 1, "name": "a"}},
+        {"repo": {"id": 2, "name": "b"}},
+        {"repo": {"id": 3, "name": "c", "owner": "bob"}},
+        {"repo": {"id": 4, "name": {"en": "d"}}},
+        {"repo": {"id": 5, "name": "e", "owner": {"login": "eve"}}},
+    )
+
+    response = import_body(client, body)
+
+    assert response.status_code == 200
+    result = response.get_json()
+    assert (result['imported'], result['invalid']) == (3, 2)
+    assert [error['line'] for error in result['errors']] == [3, 4]
+
+
+def test_save_rejects_the_same_payloads(client, sign_in):
+    sign_in(1)
+    for repo in ({"id": 3, "owner": "bob"}, {"id": 4, "name": ["d"]}):
+        response = client.post('/repos/save', json={"repo": repo})
+        assert response.status_code == 400, repo
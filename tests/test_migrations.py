@@ -0,0 +1,98 @@
+"""Schema migrations applied to a database created by the original app"""
+import json
+import sqlite3
+
+import db
+
+
+def make_legacy_db(path, rows):
+    """The original schema (user_version 0) holding (user_id, repo_data, user_note) rows"""
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE users
+                    (id INTEGER PRIMARY KEY,
+                     github_id INTEGER UNIQUE,
+                     username TEXT,
+                     access_token TEXT,
+                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    conn.execute('''CREATE TABLE saved_repos
+                    (id INTEGER PRIMARY KEY,
+                     user_id INTEGER,
+                     repo_data TEXT,
+                     user_note TEXT,
+                     saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                     FOREIGN KEY (user_id) REFERENCES users(id))''')
+    conn.executemany('INSERT INTO saved_repos (user_id, repo_data, user_note) VALUES (?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+
+def saved_rows():
+    with db.connection() as conn:
+        return conn.execute('SELECT id, repo_data, user_note, github_repo_id, owner_login FROM saved_repos ORDER BY id').fetchall()
+
+
+def test_migrates_payloads_the_old_save_endpoint_accepted(database):
+    full = {"id": 1, "name": "flask", "owner": {"login": "pallets", "id": 9}, "watchers": 5}
+    make_legacy_db(database, [
+        (1, json.dumps(full), 'kept'),
+        (1, json.dumps(["x"]), ''),
+        (1, json.dumps({"id": 5, "owner": "bob"}), ''),
+        (1, 'not json', ''),
+    ])
+
+    db.init_db()
+
+    with db.connection() as conn:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == len(db.MIGRATIONS)
+    rows = saved_rows()
+    assert json.loads(rows[0][1]) == db.slim_repo(full)
+    assert rows[0][3:] == (1, 'pallets')
+    assert rows[1][1] == '["x"]'
+    assert json.loads(rows[2][1]) == db.slim_repo({"id": 5})
+    assert rows[2][3:] == (5, None)
+    assert rows[3][1] == 'not json'
+
+
+def test_duplicate_saves_keep_the_latest_with_every_note(database):
+    repo = json.dumps({"id": 1, "name": "flask"})
+    make_legacy_db(database, [
+        (1, repo, 'first'),
+        (1, repo, ''),
+        (2, repo, 'other user'),
+        (1, repo, 'first'),
+        (1, repo, 'latest'),
+    ])
+
+    db.init_db()
+
+    assert [(row[0], row[2]) for row in saved_rows()] == [(3, 'other user'), (5, 'first\n\nlatest')]
+
+
+def test_saved_repos_are_indexed_once_with_their_user(database):
+    make_legacy_db(database, [(1, json.dumps({"id": 1, "name": "flask"}), ''),
+                              (2, json.dumps({"id": 2, "name": "django"}), '')])
+
+    db.init_db()
+
+    with db.connection() as conn:
+        assert conn.execute('SELECT rowid, name, user_tag FROM saved_repos_fts ORDER BY rowid').fetchall() == [
+            (1, 'flask', 'u1'), (2, 'django', 'u2')]
+
+
+def test_slim_repo_ignores_an_owner_that_is_not_an_object():
+    assert db.slim_repo({"id": 5, "owner": "bob"})['owner'] == {'login': None}
+    assert db.saved_repo_fields({"id": 5, "owner": ["bob"]})[3] is None
+
+
+def test_search_cache_table_gains_validators(database):
+    make_legacy_db(database, [])
+    conn = sqlite3.connect(database)
+    conn.execute('CREATE TABLE search_cache (cache_key TEXT PRIMARY KEY, payload TEXT, expires_at REAL)')
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+
+    with db.connection() as conn:
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(search_cache)')]
+    assert columns == ['cache_key', 'payload', 'expires_at', 'validators']
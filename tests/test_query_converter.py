@@ -0,0 +1,223 @@
+"""Parity of smart_query_converter with the implementation it replaced
+
+The converter's tables are precompiled into one phrase matcher; these tests
+keep a frozen copy of the original per-call implementation and check that
+both give the same result over hand-picked queries and a generated corpus.
+Run from the project root:
+    python -m pytest tests
+"""
+import random
+import re
+
+import pytest
+
+import app  # conftest.py disables the query-expansion model
+
+
+def legacy_smart_query_converter(user_query):
+    """smart_query_converter as it was before its tables were precompiled"""
+    
+    query = user_query.lower().strip()
+    
+    # Initialize result structure
+    result = {
+        "keywords": [],
+        "language": None,
+        "qualifiers": []
+    }
+    
+    # Language detection patterns
+    language_patterns = {
+        'python': ['python', 'py', 'django', 'flask', 'fastapi', 'pandas', 'numpy', 'scikit', 'tensorflow'],
+        'javascript': ['javascript', 'js', 'node', 'react', 'vue', 'angular', 'express', 'npm'],
+        'typescript': ['typescript', 'ts'],
+        'java': ['java', 'spring', 'hibernate', 'maven'],
+        'go': ['go', 'golang'],
+        'rust': ['rust'],
+        'cpp': ['c++', 'cpp'],
+        'c': [' c ', 'c library', 'c framework'],
+        'php': ['php', 'laravel', 'symfony', 'composer'],
+        'ruby': ['ruby', 'rails', 'gem'],
+        'swift': ['swift', 'ios'],
+        'kotlin': ['kotlin', 'android'],
+        'csharp': ['c#', 'csharp', '.net', 'dotnet'],
+        'shell': ['bash', 'shell', 'script'],
+        'html': ['html', 'css', 'web'],
+        'r': [' r ', 'r language', 'rstats'],
+        'scala': ['scala'],
+        'dart': ['dart', 'flutter']
+    }
+    
+    # Detect programming language
+    for lang, patterns in language_patterns.items():
+        if any(pattern in query for pattern in patterns):
+            result['language'] = lang
+            break
+    
+    # Topic mapping - maps common phrases to GitHub search keywords
+    topic_mapping = {
+        # Web Development
+        'web scraping': ['web-scraping', 'scraper', 'crawler'],
+        'scraping': ['scraper', 'web-scraping'],
+        'crawler': ['crawler', 'scraper'],
+        'dashboard': ['dashboard', 'admin', 'panel'],
+        'admin panel': ['admin', 'dashboard', 'panel'],
+        'ui components': ['ui', 'components', 'library'],
+        'component library': ['components', 'ui', 'library'],
+        'rest api': ['rest-api', 'api'],
+        'graphql': ['graphql', 'api'],
+        'authentication': ['auth', 'authentication', 'login'],
+        'oauth': ['oauth', 'authentication'],
+        'jwt': ['jwt', 'auth'],
+        
+        # Data & ML
+        'machine learning': ['machine-learning', 'ml', 'ai'],
+        'deep learning': ['deep-learning', 'neural-network', 'ml'],
+        'neural network': ['neural-network', 'deep-learning'],
+        'data science': ['data-science', 'analytics', 'visualization'],
+        'data visualization': ['visualization', 'charts', 'plotting'],
+        'database': ['database', 'db', 'storage'],
+        'sql': ['sql', 'database'],
+        'nosql': ['nosql', 'database'],
+        'mongodb': ['mongodb', 'nosql'],
+        'postgres': ['postgresql', 'database'],
+        'mysql': ['mysql', 'database'],
+        
+        # Development Tools
+        'testing': ['testing', 'test', 'unittest'],
+        'unit test': ['unittest', 'testing'],
+        'docker': ['docker', 'container'],
+        'kubernetes': ['kubernetes', 'k8s', 'container'],
+        'ci/cd': ['ci-cd', 'automation', 'deployment'],
+        'deployment': ['deployment', 'deploy'],
+        'monitoring': ['monitoring', 'logging', 'metrics'],
+        'logging': ['logging', 'monitor'],
+        
+        # Mobile & Game Development
+        'mobile': ['mobile', 'app'],
+        'android': ['android', 'mobile'],
+        'ios': ['ios', 'mobile'],
+        'game engine': ['game-engine', 'game', 'gaming'],
+        'game development': ['game', 'gaming', 'engine'],
+        '2d game': ['2d', 'game'],
+        '3d game': ['3d', 'game'],
+        
+        # Tools & Utilities
+        'command line': ['cli', 'command-line'],
+        'cli tool': ['cli', 'tool'],
+        'parser': ['parser', 'parsing'],
+        'json parser': ['json', 'parser'],
+        'xml parser': ['xml', 'parser'],
+        'file upload': ['upload', 'file'],
+        'image processing': ['image', 'processing', 'graphics'],
+        'pdf': ['pdf', 'document'],
+        'email': ['email', 'mail'],
+        'encryption': ['encryption', 'crypto', 'security'],
+        'security': ['security', 'auth'],
+        'blockchain': ['blockchain', 'crypto'],
+        'cryptocurrency': ['crypto', 'blockchain']
+    }
+    
+    # Extract keywords based on topics found
+    keywords_found = set()
+    for phrase, keywords in topic_mapping.items():
+        if phrase in query:
+            keywords_found.update(keywords)
+    
+    # Add general keywords from the query (filter out common words)
+    stop_words = {
+        'i', 'need', 'want', 'looking', 'for', 'a', 'an', 'the', 'that', 'can', 
+        'help', 'me', 'with', 'to', 'and', 'or', 'but', 'is', 'are', 'was', 
+        'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
+        'would', 'could', 'should', 'may', 'might', 'must', 'shall', 'library',
+        'framework', 'tool', 'application', 'app', 'project', 'code', 'simple',
+        'easy', 'good', 'best', 'great', 'awesome', 'cool', 'nice'
+    }
+    
+    # Extract meaningful words
+    words = re.findall(r'\b\w+\b', query)
+    meaningful_words = [word for word in words if len(word) > 2 and word not in stop_words]
+    
+    # Add some meaningful words as keywords (limit to avoid too broad search)
+    keywords_found.update(meaningful_words[:3])
+    
+    result['keywords'] = list(keywords_found)[:3]  # Limit to 3 keywords max for better results
+    
+    # Quality and difficulty qualifiers
+    if any(word in query for word in ['beginner', 'easy', 'simple', 'starter']):
+        result['qualifiers'].extend(['stars:>100'])  # Just use stars, not good-first-issues
+    elif any(word in query for word in ['popular', 'widely used', 'well known', 'famous']):
+        result['qualifiers'].extend(['stars:>1000', 'forks:>100'])
+    elif any(word in query for word in ['mature', 'stable', 'production']):
+        result['qualifiers'].extend(['stars:>500', 'pushed:>2023-01-01'])
+    else:
+        # Default quality filter
+        result['qualifiers'].append('stars:>10')
+    
+    # Size preferences
+    if any(word in query for word in ['lightweight', 'small', 'minimal']):
+        result['qualifiers'].append('size:<1000')
+    elif any(word in query for word in ['comprehensive', 'full', 'complete']):
+        result['qualifiers'].append('size:>1000')
+    
+    # Activity preferences
+    if any(word in query for word in ['active', 'maintained', 'recent', 'updated']):
+        result['qualifiers'].append('pushed:>2023-06-01')
+    
+    return result
+
+
+
+QUERIES = [
+    "Python web scraping library for beginners",
+    "Popular React dashboard components",
+    "JavaScript game engine for 2D games",
+    "Docker configuration for Node.js",
+    "Lightweight JSON parser",
+    "Active authentication library",
+    "c library for json",
+    "I need a c framework",
+    "r language stats",
+    "golang cli tool",
+    "ios swift app",
+    "c# .net api",
+    "mature stable production kubernetes",
+    "well known full complete ci/cd",
+    "small recent updated machine learning in rust",
+    "  Deep Learning neural network data science  ",
+    "xml parser json parser pdf email",
+    "crypto cryptocurrency blockchain",
+    "scala dart flutter",
+    "happy goat",
+    "",
+]
+
+
+def corpus_words():
+    """Every pattern, phrase and stop word the converter knows, plus a few it does not"""
+    words = {pattern for patterns in app.LANGUAGE_PATTERNS.values() for pattern in patterns}
+    words.update(app.TOPIC_MAPPING)
+    words.update(app.STOP_WORDS)
+    words.update(['beginner', 'popular', 'widely used', 'famous', 'minimal', 'maintained',
+                  'library', 'c', 'r', 'foo', 'xyz'])
+    return sorted(words)
+
+
+def generated_corpus(count, seed=1):
+    """Queries made of known words, joined with spaces and run together"""
+    rng = random.Random(seed)
+    words = corpus_words()
+    for _ in range(count):
+        yield ' '.join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+        yield ''.join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_matches_legacy(query):
+    assert app.smart_query_converter(query) == legacy_smart_query_converter(query)
+
+
+def test_matches_legacy_on_generated_corpus():
+    mismatches = [query for query in generated_corpus(5000)
+                  if app.smart_query_converter(query) != legacy_smart_query_converter(query)]
+    assert mismatches == []
@@ -0,0 +1,24 @@
+"""Language and keyword variants a multi search fans out into"""
+import pytest
+
+import app
+
+
+def variant_languages(query):
+    return [variant['language'] for variant in app.query_variants(query, app.smart_query_converter(query))[1:]]
+
+
+@pytest.mark.parametrize('query, unwanted', [
+    ("JavaScript game engine", {'java', 'shell'}),
+    ("django rest api", {'go'}),
+    ("typescript charts library", {'shell'}),
+    ("python web scraping", {'html'}),
+])
+def test_no_variant_for_a_pattern_inside_a_longer_word_or_phrase(query, unwanted):
+    assert not unwanted & set(variant_languages(query))
+
+
+def test_each_language_named_as_a_word_gets_a_variant():
+    assert variant_languages("react or vue with python and rust").count('javascript') == 1
+    assert 'rust' in variant_languages("react or vue with python and rust")
+    assert 'c' in variant_languages("c library for json")
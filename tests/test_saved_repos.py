@@ -0,0 +1,82 @@
+"""Saving, listing and checking repositories through the API"""
+import pytest
+
+
+def save(client, repo_id, name, note=''):
+    response = client.post('/repos/save', json={"repo": {"id": repo_id, "name": name}, "note": note})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['saved_id']
+
+
+def saved_page(client, **params):
+    response = client.get('/repos/saved', query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+@pytest.mark.parametrize('repo_id', ['1', 1.0, True, None])
+def test_save_requires_an_integer_repo_id(client, sign_in, repo_id):
+    sign_in(1)
+
+    response = client.post('/repos/save', json={"repo": {"id": repo_id, "name": "flask"}})
+
+    assert response.status_code == 400
+
+
+def test_saving_twice_returns_the_first_save(client, sign_in):
+    sign_in(1)
+    saved_id = save(client, 1, 'flask')
+
+    response = client.post('/repos/save', json={"repo": {"id": 1, "name": "flask"}})
+
+    assert response.status_code == 409
+    assert response.get_json()['saved_id'] == saved_id
+
+
+def test_saved_repos_page_by_cursor(client, sign_in):
+    sign_in(1)
+    saved_ids = [save(client, repo_id, f'repo{repo_id}') for repo_id in range(1, 6)]
+
+    pages = [saved_page(client, limit=2)]
+    while pages[-1]['next_cursor']:
+        pages.append(saved_page(client, limit=2, cursor=pages[-1]['next_cursor']))
+
+    assert [[repo['id'] for repo in page['repos']] for page in pages] == [
+        saved_ids[4:2:-1], saved_ids[2:0:-1], saved_ids[:1]]
+    assert client.get('/repos/saved', query_string={'cursor': 'nope'}).status_code == 400
+
+
+def test_saved_repos_filter_by_name_and_note(client, sign_in):
+    sign_in(1)
+    flask = save(client, 1, 'flask', note='micro framework')
+    save(client, 2, 'django')
+    framework = save(client, 3, 'fastapi', note='async framework')
+
+    assert [repo['id'] for repo in saved_page(client, q='flask')['repos']] == [flask]
+    assert [repo['id'] for repo in saved_page(client, q='framework')['repos']] == [framework, flask]
+    page = saved_page(client, q='framework', limit=1)
+    assert [repo['id'] for repo in saved_page(client, q='framework', cursor=page['next_cursor'])['repos']] == [flask]
+
+
+def test_saved_search_only_sees_the_users_own_repos(client, sign_in):
+    sign_in(2)
+    for repo_id in range(1, 21):
+        save(client, repo_id, 'flask', note='flask secret')
+    sign_in(1)
+    own = save(client, 100, 'bottle', note='not flask')  # ranks below every row of user 2
+
+    response = client.get('/repos/saved/search', query_string={'q': 'flask', 'limit': 5})
+
+    assert response.status_code == 200
+    assert [repo['id'] for repo in response.get_json()['repos']] == [own]
+    assert client.get('/repos/saved/search', query_string={'q': 'secret'}).get_json()['repos'] == []
+    assert saved_page(client, q='secret')['repos'] == []
+
+
+@pytest.mark.parametrize('body', [[1, 2], 'repo_ids', 7])
+def test_batch_check_rejects_a_body_that_is_not_an_object(client, sign_in, body):
+    sign_in(1)
+
+    response = client.post('/repos/check', json=body)
+
+    assert response.status_code == 400
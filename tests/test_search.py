@@ -0,0 +1,67 @@
+"""GitHub search through the response cache and the local repository index"""
+import json
+
+import app
+
+
+def github_items(count):
+    """Search results as GitHub sends them, with fields the slim record drops"""
+    return [{"id": n, "name": f"flask-{n}", "full_name": f"owner/flask-{n}", "description": "flask extension",
+             "stargazers_count": n, "watchers": n, "owner": {"login": "owner", "id": 7}}
+            for n in range(1, count + 1)]
+
+
+def fake_github(monkeypatch, items):
+    calls = []
+
+    def fetch(query, per_page=12, sort="stars", validators=None):
+        calls.append(query)
+        return items, {}
+    monkeypatch.setattr(app, 'fetch_github_repositories', fetch)
+    return calls
+
+
+def test_full_results_skip_the_slim_local_index(client, monkeypatch):
+    items = github_items(12)
+    calls = fake_github(monkeypatch, items)
+    app.repo_index.harvest(items)
+
+    assert 'watchers' not in app.search_github_repositories('flask')[0]
+    assert calls == []
+
+    assert app.search_github_repositories('flask', full=True) == items
+    assert calls == ['flask']
+
+
+def failing_github(monkeypatch):
+    def search(query, per_page=12, sort="stars", full=False):
+        raise Exception("GitHub is down")
+    monkeypatch.setattr(app, 'search_github_repositories', search)
+
+
+def stream_events(client, body):
+    response = client.post('/search/stream', json=body)
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_search_and_stream_share_the_stale_fallback(client, monkeypatch):
+    body = {"query": "python web scraping dashboard", "multi": True}
+    _, _, github_queries = app.plan_search(body['query'], True)
+    for query, items in zip(github_queries, (github_items(3), github_items(5)[3:])):
+        app.search_cache.set(app.search_cache_key(query, 12, "stars"), items)
+    failing_github(monkeypatch)
+
+    searched = client.post('/search', json=body).get_json()
+    events = stream_events(client, body)
+
+    assert searched['partial'] is True
+    assert [event['type'] for event in events] == ['query', 'repositories', 'done']
+    assert events[-1]['order'] == [repo['id'] for repo in searched['repositories']] == [5, 4, 3, 2, 1]
+
+
+def test_search_and_stream_both_fail_without_stale_copies(client, monkeypatch):
+    body = {"query": "python web scraping dashboard", "multi": True}
+    failing_github(monkeypatch)
+
+    assert client.post('/search', json=body).status_code == 500
+    assert stream_events(client, body)[-1]['type'] == 'error'
@@ -0,0 +1,8 @@
+"""Production entry point: gunicorn -c gunicorn.conf.py wsgi:app"""
+import os
+
+from app import create_app
+
+# gunicorn.conf.py runs the migrations once in the master process and turns
+# this off for the workers; other WSGI servers migrate on startup
+app = create_app(init_database=os.getenv('DB_INIT_ON_START', '1').lower() in ('1', 'true', 'yes'))